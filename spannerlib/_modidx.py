@@ -24,6 +24,12 @@ d = { 'settings': { 'branch': 'master',
                                                                              'spannerlib/data_types.py'),
                                        'spannerlib.data_types.IERelation.__hash__': ( 'primitive_data_types.html#ierelation.__hash__',
                                                                                       'spannerlib/data_types.py'),
+                                       'spannerlib.data_types.MergeableAGG': ( 'primitive_data_types.html#mergeableagg',
+                                                                               'spannerlib/data_types.py'),
+                                       'spannerlib.data_types.MergeableAGG.__call__': ( 'primitive_data_types.html#mergeableagg.__call__',
+                                                                                        'spannerlib/data_types.py'),
+                                       'spannerlib.data_types.MergeableAGG.finalize_state': ( 'primitive_data_types.html#mergeableagg.finalize_state',
+                                                                                              'spannerlib/data_types.py'),
                                        'spannerlib.data_types.Relation': ('primitive_data_types.html#relation', 'spannerlib/data_types.py'),
                                        'spannerlib.data_types.RelationDefinition': ( 'primitive_data_types.html#relationdefinition',
                                                                                      'spannerlib/data_types.py'),
@@ -36,12 +42,23 @@ d = { 'settings': { 'branch': 'master',
                                        'spannerlib.data_types.isFloat': ('primitive_data_types.html#isfloat', 'spannerlib/data_types.py'),
                                        'spannerlib.data_types.isInt': ('primitive_data_types.html#isint', 'spannerlib/data_types.py'),
                                        'spannerlib.data_types.pretty': ('primitive_data_types.html#pretty', 'spannerlib/data_types.py')},
-            'spannerlib.engine': { 'spannerlib.engine.DB': ('engine.html#db', 'spannerlib/engine.py'),
+            'spannerlib.engine': { 'spannerlib.engine.Backend': ('engine.html#backend', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Backend.__init__': ('engine.html#backend.__init__', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Backend.__repr__': ('engine.html#backend.__repr__', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Backend.compute_node': ('engine.html#backend.compute_node', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Backend.compute_recursive_component': ('engine.html#backend.compute_recursive_component', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.DB': ('engine.html#db', 'spannerlib/engine.py'),
                                    'spannerlib.engine.DB.__repr__': ('engine.html#db.__repr__', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine': ('engine.html#engine', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.__init__': ('engine.html#engine.__init__', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine._enforce_memory_budget': ( 'engine.html#engine._enforce_memory_budget',
+                                                                                        'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine._evict_ie_caches': ('engine.html#engine._evict_ie_caches', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine._ie_caches': ('engine.html#engine._ie_caches', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine._inline_db_and_ies_in_graph': ( 'engine.html#engine._inline_db_and_ies_in_graph',
                                                                                              'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine._relation_nbytes': ('engine.html#engine._relation_nbytes', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine._total_memory_usage': ('engine.html#engine._total_memory_usage', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.add_fact': ('engine.html#engine.add_fact', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.add_facts': ('engine.html#engine.add_facts', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.add_rule': ('engine.html#engine.add_rule', 'spannerlib/engine.py'),
@@ -57,27 +74,45 @@ d = { 'settings': { 'branch': 'master',
                                    'spannerlib.engine.Engine.execute_plan': ('engine.html#engine.execute_plan', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.get_agg_function': ( 'engine.html#engine.get_agg_function',
                                                                                   'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine.get_function_stats': ( 'engine.html#engine.get_function_stats',
+                                                                                    'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.get_ie_function': ( 'engine.html#engine.get_ie_function',
                                                                                  'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.get_relation': ('engine.html#engine.get_relation', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.get_var': ('engine.html#engine.get_var', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine.load': ('engine.html#engine.load', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine.memory_usage': ('engine.html#engine.memory_usage', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.plan_query': ('engine.html#engine.plan_query', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.run_query': ('engine.html#engine.run_query', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine.save': ('engine.html#engine.save', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.set_agg_function': ( 'engine.html#engine.set_agg_function',
                                                                                   'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine.set_disk_relation': ( 'engine.html#engine.set_disk_relation',
+                                                                                   'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.set_ie_function': ( 'engine.html#engine.set_ie_function',
                                                                                  'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.set_relation': ('engine.html#engine.set_relation', 'spannerlib/engine.py'),
                                    'spannerlib.engine.Engine.set_var': ('engine.html#engine.set_var', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.Engine.snapshot_db': ('engine.html#engine.snapshot_db', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.ReadWriteLock': ('engine.html#readwritelock', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.ReadWriteLock.__init__': ( 'engine.html#readwritelock.__init__',
+                                                                                 'spannerlib/engine.py'),
+                                   'spannerlib.engine.ReadWriteLock.read': ('engine.html#readwritelock.read', 'spannerlib/engine.py'),
+                                   'spannerlib.engine.ReadWriteLock.write': ('engine.html#readwritelock.write', 'spannerlib/engine.py'),
+                                   'spannerlib.engine._IEDelta': ('engine.html#_iedelta', 'spannerlib/engine.py'),
+                                   'spannerlib.engine._IEDelta.__call__': ('engine.html#_iedelta.__call__', 'spannerlib/engine.py'),
+                                   'spannerlib.engine._IEDelta.__init__': ('engine.html#_iedelta.__init__', 'spannerlib/engine.py'),
+                                   'spannerlib.engine._check_cancelled': ('engine.html#_check_cancelled', 'spannerlib/engine.py'),
                                    'spannerlib.engine._collect_children_and_run': ( 'engine.html#_collect_children_and_run',
                                                                                     'spannerlib/engine.py'),
-                                   'spannerlib.engine._depends_on_cycle': ('engine.html#_depends_on_cycle', 'spannerlib/engine.py'),
-                                   'spannerlib.engine._in_cycle': ('engine.html#_in_cycle', 'spannerlib/engine.py'),
+                                   'spannerlib.engine._head_aggregations': ('engine.html#_head_aggregations', 'spannerlib/engine.py'),
+                                   'spannerlib.engine._mark_monotone_unions': ('engine.html#_mark_monotone_unions', 'spannerlib/engine.py'),
                                    'spannerlib.engine._pd_drop_row': ('engine.html#_pd_drop_row', 'spannerlib/engine.py'),
+                                   'spannerlib.engine._writes': ('engine.html#_writes', 'spannerlib/engine.py'),
                                    'spannerlib.engine.compute_acyclic_node': ('engine.html#compute_acyclic_node', 'spannerlib/engine.py'),
                                    'spannerlib.engine.compute_node': ('engine.html#compute_node', 'spannerlib/engine.py'),
-                                   'spannerlib.engine.compute_recursive_node': ( 'engine.html#compute_recursive_node',
-                                                                                 'spannerlib/engine.py'),
+                                   'spannerlib.engine.compute_recursive_component': ( 'engine.html#compute_recursive_component',
+                                                                                      'spannerlib/engine.py'),
                                    'spannerlib.engine.get_rel': ('engine.html#get_rel', 'spannerlib/engine.py')},
             'spannerlib.execution': {'spannerlib.execution.naive_execution': ('execution.html#naive_execution', 'spannerlib/execution.py')},
             'spannerlib.grammar': { 'spannerlib.grammar.lark_to_nx': ('spannerlog_grammar.html#lark_to_nx', 'spannerlib/grammar.py'),
@@ -175,6 +210,29 @@ d = { 'settings': { 'branch': 'master',
                                                                                                                        'spannerlib/ie_func/rust_spanner_regex.py'),
                                                        'spannerlib.ie_func.rust_spanner_regex.rgx_string_out_type': ( 'callbacks/rust_spanner_regex.html#rgx_string_out_type',
                                                                                                                       'spannerlib/ie_func/rust_spanner_regex.py')},
+            'spannerlib.ie_store': { 'spannerlib.ie_store.IEResultStore': ('ie_result_store.html#ieresultstore', 'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore.__getstate__': ( 'ie_result_store.html#ieresultstore.__getstate__',
+                                                                                         'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore.__init__': ( 'ie_result_store.html#ieresultstore.__init__',
+                                                                                     'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore.__repr__': ( 'ie_result_store.html#ieresultstore.__repr__',
+                                                                                     'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore.__setstate__': ( 'ie_result_store.html#ieresultstore.__setstate__',
+                                                                                         'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore._connection': ( 'ie_result_store.html#ieresultstore._connection',
+                                                                                        'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore.get_many': ( 'ie_result_store.html#ieresultstore.get_many',
+                                                                                     'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore.info': ( 'ie_result_store.html#ieresultstore.info',
+                                                                                 'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore.outputs': ( 'ie_result_store.html#ieresultstore.outputs',
+                                                                                    'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore.purge': ( 'ie_result_store.html#ieresultstore.purge',
+                                                                                  'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store.IEResultStore.put_many': ( 'ie_result_store.html#ieresultstore.put_many',
+                                                                                     'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store._doc_hash': ('ie_result_store.html#_doc_hash', 'spannerlib/ie_store.py'),
+                                     'spannerlib.ie_store._input_hash': ('ie_result_store.html#_input_hash', 'spannerlib/ie_store.py')},
             'spannerlib.magic': { 'spannerlib.magic._MagicSession': ('magic_system.html#_magicsession', 'spannerlib/magic.py'),
                                   'spannerlib.magic._MagicSession.__init__': ( 'magic_system.html#_magicsession.__init__',
                                                                                'spannerlib/magic.py'),
@@ -189,6 +247,62 @@ d = { 'settings': { 'branch': 'master',
                                   'spannerlib.magic.spannerlogMagic': ('magic_system.html#spannerlogmagic', 'spannerlib/magic.py'),
                                   'spannerlib.magic.spannerlogMagic.spannerlog': ( 'magic_system.html#spannerlogmagic.spannerlog',
                                                                                    'spannerlib/magic.py')},
+            'spannerlib.memory': { 'spannerlib.memory.MemoryBudget': ('memory_budget.html#memorybudget', 'spannerlib/memory.py'),
+                                   'spannerlib.memory.MemoryBudget.__init__': ( 'memory_budget.html#memorybudget.__init__',
+                                                                                'spannerlib/memory.py'),
+                                   'spannerlib.memory.MemoryBudget._evict': ( 'memory_budget.html#memorybudget._evict',
+                                                                              'spannerlib/memory.py'),
+                                   'spannerlib.memory.MemoryBudget._spill': ( 'memory_budget.html#memorybudget._spill',
+                                                                              'spannerlib/memory.py'),
+                                   'spannerlib.memory.MemoryBudget.load': ('memory_budget.html#memorybudget.load', 'spannerlib/memory.py'),
+                                   'spannerlib.memory.MemoryBudget.load_all': ( 'memory_budget.html#memorybudget.load_all',
+                                                                                'spannerlib/memory.py'),
+                                   'spannerlib.memory.MemoryBudget.nbytes': ( 'memory_budget.html#memorybudget.nbytes',
+                                                                              'spannerlib/memory.py'),
+                                   'spannerlib.memory.MemoryBudget.release': ( 'memory_budget.html#memorybudget.release',
+                                                                               'spannerlib/memory.py'),
+                                   'spannerlib.memory.MemoryBudget.track': ( 'memory_budget.html#memorybudget.track',
+                                                                             'spannerlib/memory.py'),
+                                   'spannerlib.memory.SpilledRelation': ('memory_budget.html#spilledrelation', 'spannerlib/memory.py'),
+                                   'spannerlib.memory.SpilledRelation.__init__': ( 'memory_budget.html#spilledrelation.__init__',
+                                                                                   'spannerlib/memory.py'),
+                                   'spannerlib.memory.SpilledRelation.__repr__': ( 'memory_budget.html#spilledrelation.__repr__',
+                                                                                   'spannerlib/memory.py'),
+                                   'spannerlib.memory.SpilledRelation.load': ( 'memory_budget.html#spilledrelation.load',
+                                                                               'spannerlib/memory.py'),
+                                   'spannerlib.memory.relation_nbytes': ('memory_budget.html#relation_nbytes', 'spannerlib/memory.py'),
+                                   'spannerlib.memory.row_set_nbytes': ('memory_budget.html#row_set_nbytes', 'spannerlib/memory.py')},
+            'spannerlib.metrics': { 'spannerlib.metrics.FunctionStats': ('function_stats.html#functionstats', 'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.__getstate__': ( 'function_stats.html#functionstats.__getstate__',
+                                                                                       'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.__init__': ( 'function_stats.html#functionstats.__init__',
+                                                                                   'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.__repr__': ( 'function_stats.html#functionstats.__repr__',
+                                                                                   'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.__setstate__': ( 'function_stats.html#functionstats.__setstate__',
+                                                                                       'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats._add_sample': ( 'function_stats.html#functionstats._add_sample',
+                                                                                      'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.as_dict': ( 'function_stats.html#functionstats.as_dict',
+                                                                                  'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.merge': ( 'function_stats.html#functionstats.merge',
+                                                                                'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.percentile': ( 'function_stats.html#functionstats.percentile',
+                                                                                     'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.record_call': ( 'function_stats.html#functionstats.record_call',
+                                                                                      'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.record_error': ( 'function_stats.html#functionstats.record_error',
+                                                                                       'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.record_rows': ( 'function_stats.html#functionstats.record_rows',
+                                                                                      'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.FunctionStats.timed': ( 'function_stats.html#functionstats.timed',
+                                                                                'spannerlib/metrics.py'),
+                                    'spannerlib.metrics._prometheus_label': ( 'function_stats.html#_prometheus_label',
+                                                                              'spannerlib/metrics.py'),
+                                    'spannerlib.metrics._prometheus_value': ( 'function_stats.html#_prometheus_value',
+                                                                              'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.prometheus_text': ('function_stats.html#prometheus_text', 'spannerlib/metrics.py'),
+                                    'spannerlib.metrics.stats_frame': ('function_stats.html#stats_frame', 'spannerlib/metrics.py')},
             'spannerlib.micro_passes': { 'spannerlib.micro_passes.CheckReservedRelationNames': ( 'micro_passes.html#checkreservedrelationnames',
                                                                                                  'spannerlib/micro_passes.py'),
                                          'spannerlib.micro_passes.CheckReservedRelationNames.__call__': ( 'micro_passes.html#checkreservedrelationnames.__call__',
@@ -219,7 +333,22 @@ d = { 'settings': { 'branch': 'master',
                                                                                            'spannerlib/micro_passes.py'),
                                          'spannerlib.micro_passes.verify_referenced_relations_and_functions': ( 'micro_passes.html#verify_referenced_relations_and_functions',
                                                                                                                 'spannerlib/micro_passes.py')},
-            'spannerlib.opt': {},
+            'spannerlib.opt': { 'spannerlib.opt._columns_read_by_parents': ( 'query_optimizations.html#_columns_read_by_parents',
+                                                                             'spannerlib/opt.py'),
+                                'spannerlib.opt._gyo_join_tree': ('query_optimizations.html#_gyo_join_tree', 'spannerlib/opt.py'),
+                                'spannerlib.opt._is_acyclic': ('query_optimizations.html#_is_acyclic', 'spannerlib/opt.py'),
+                                'spannerlib.opt._is_disk_scan': ('query_optimizations.html#_is_disk_scan', 'spannerlib/opt.py'),
+                                'spannerlib.opt._is_inner_join': ('query_optimizations.html#_is_inner_join', 'spannerlib/opt.py'),
+                                'spannerlib.opt._join_tree': ('query_optimizations.html#_join_tree', 'spannerlib/opt.py'),
+                                'spannerlib.opt._narrow_project': ('query_optimizations.html#_narrow_project', 'spannerlib/opt.py'),
+                                'spannerlib.opt._private_scan': ('query_optimizations.html#_private_scan', 'spannerlib/opt.py'),
+                                'spannerlib.opt._replace_child': ('query_optimizations.html#_replace_child', 'spannerlib/opt.py'),
+                                'spannerlib.opt.push_projections_into_scans': ( 'query_optimizations.html#push_projections_into_scans',
+                                                                                'spannerlib/opt.py'),
+                                'spannerlib.opt.push_selections_into_scans': ( 'query_optimizations.html#push_selections_into_scans',
+                                                                               'spannerlib/opt.py'),
+                                'spannerlib.opt.semijoin_reduce': ('query_optimizations.html#semijoin_reduce', 'spannerlib/opt.py'),
+                                'spannerlib.opt.use_multiway_joins': ('query_optimizations.html#use_multiway_joins', 'spannerlib/opt.py')},
             'spannerlib.optimizations_passes': { 'spannerlib.optimizations_passes.PruneUnnecessaryProjectNodes': ( 'optimizations_passes.html#pruneunnecessaryprojectnodes',
                                                                                                                    'spannerlib/optimizations_passes.py'),
                                                  'spannerlib.optimizations_passes.PruneUnnecessaryProjectNodes.__init__': ( 'optimizations_passes.html#pruneunnecessaryprojectnodes.__init__',
@@ -238,11 +367,123 @@ d = { 'settings': { 'branch': 'master',
                                                                                                                                               'spannerlib/optimizations_passes.py'),
                                                  'spannerlib.optimizations_passes.RemoveUselessRelationsFromRule.run_pass': ( 'optimizations_passes.html#removeuselessrelationsfromrule.run_pass',
                                                                                                                               'spannerlib/optimizations_passes.py')},
-            'spannerlib.ra': { 'spannerlib.ra._col_names': ('extended_ra_operations.html#_col_names', 'spannerlib/ra.py'),
+            'spannerlib.partitioned_backend': { 'spannerlib.partitioned_backend.PartitionedBackend': ( 'partitioned_backend.html#partitionedbackend',
+                                                                                                       'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend.__init__': ( 'partitioned_backend.html#partitionedbackend.__init__',
+                                                                                                                'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend._is_small': ( 'partitioned_backend.html#partitionedbackend._is_small',
+                                                                                                                 'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend._map_partitions': ( 'partitioned_backend.html#partitionedbackend._map_partitions',
+                                                                                                                       'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend._set_op': ( 'partitioned_backend.html#partitionedbackend._set_op',
+                                                                                                               'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend._worker_fixpoint': ('partitioned_backend.html#partitionedbackend._worker_fixpoint', 'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend.close': ( 'partitioned_backend.html#partitionedbackend.close',
+                                                                                                             'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend.compute_recursive_component': ('partitioned_backend.html#partitionedbackend.compute_recursive_component', 'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend.difference': ( 'partitioned_backend.html#partitionedbackend.difference',
+                                                                                                                  'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend.groupby': ( 'partitioned_backend.html#partitionedbackend.groupby',
+                                                                                                               'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend.intersection': ( 'partitioned_backend.html#partitionedbackend.intersection',
+                                                                                                                    'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend.join': ( 'partitioned_backend.html#partitionedbackend.join',
+                                                                                                            'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend.pool': ( 'partitioned_backend.html#partitionedbackend.pool',
+                                                                                                            'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend.PartitionedBackend.union': ( 'partitioned_backend.html#partitionedbackend.union',
+                                                                                                             'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend._concat': ( 'partitioned_backend.html#_concat',
+                                                                                            'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend._delta_graph': ('partitioned_backend.html#_delta_graph', 'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend._fixpoint_worker': ('partitioned_backend.html#_fixpoint_worker', 'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend._is_picklable': ( 'partitioned_backend.html#_is_picklable',
+                                                                                                  'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend._linear_recursion': ('partitioned_backend.html#_linear_recursion', 'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend._partition': ( 'partitioned_backend.html#_partition',
+                                                                                               'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend._receive_reply': ('partitioned_backend.html#_receive_reply', 'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend._run_task': ( 'partitioned_backend.html#_run_task',
+                                                                                              'spannerlib/partitioned_backend.py'),
+                                                'spannerlib.partitioned_backend._send_reply': ('partitioned_backend.html#_send_reply', 'spannerlib/partitioned_backend.py')},
+            'spannerlib.polars_backend': { 'spannerlib.polars_backend.PolarsBackend': ( 'polars_backend.html#polarsbackend',
+                                                                                        'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend.PolarsBackend.__init__': ( 'polars_backend.html#polarsbackend.__init__',
+                                                                                                 'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend.PolarsBackend._with_min_rows': ( 'polars_backend.html#polarsbackend._with_min_rows',
+                                                                                                       'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend._is_polars_compatible': ( 'polars_backend.html#_is_polars_compatible',
+                                                                                                'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend._is_string_column': ('polars_backend.html#_is_string_column', 'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend._same_string_columns': ('polars_backend.html#_same_string_columns', 'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend._string_columns': ('polars_backend.html#_string_columns', 'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend._to_pandas': ( 'polars_backend.html#_to_pandas',
+                                                                                     'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend._to_polars': ( 'polars_backend.html#_to_polars',
+                                                                                     'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend.pl_difference': ( 'polars_backend.html#pl_difference',
+                                                                                        'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend.pl_groupby': ( 'polars_backend.html#pl_groupby',
+                                                                                     'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend.pl_intersection': ( 'polars_backend.html#pl_intersection',
+                                                                                          'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend.pl_join': ( 'polars_backend.html#pl_join',
+                                                                                  'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend.pl_product': ( 'polars_backend.html#pl_product',
+                                                                                     'spannerlib/polars_backend.py'),
+                                           'spannerlib.polars_backend.pl_union': ( 'polars_backend.html#pl_union',
+                                                                                   'spannerlib/polars_backend.py')},
+            'spannerlib.ra': { 'spannerlib.ra.IECache': ('extended_ra_operations.html#iecache', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache.__init__': ('extended_ra_operations.html#iecache.__init__', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache.__len__': ('extended_ra_operations.html#iecache.__len__', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache.__repr__': ('extended_ra_operations.html#iecache.__repr__', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache._entry_nbytes': ('extended_ra_operations.html#iecache._entry_nbytes', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache.clear': ('extended_ra_operations.html#iecache.clear', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache.get': ('extended_ra_operations.html#iecache.get', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache.key': ('extended_ra_operations.html#iecache.key', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache.put': ('extended_ra_operations.html#iecache.put', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache.shrink': ('extended_ra_operations.html#iecache.shrink', 'spannerlib/ra.py'),
+                               'spannerlib.ra.IECache.stats': ('extended_ra_operations.html#iecache.stats', 'spannerlib/ra.py'),
+                               'spannerlib.ra.RowSet': ('extended_ra_operations.html#rowset', 'spannerlib/ra.py'),
+                               'spannerlib.ra.RowSet.__init__': ('extended_ra_operations.html#rowset.__init__', 'spannerlib/ra.py'),
+                               'spannerlib.ra.RowSet._contains': ('extended_ra_operations.html#rowset._contains', 'spannerlib/ra.py'),
+                               'spannerlib.ra.RowSet.new_rows': ('extended_ra_operations.html#rowset.new_rows', 'spannerlib/ra.py'),
+                               'spannerlib.ra._SpanRef': ('extended_ra_operations.html#_spanref', 'spannerlib/ra.py'),
+                               'spannerlib.ra._SpanRef.__init__': ('extended_ra_operations.html#_spanref.__init__', 'spannerlib/ra.py'),
+                               'spannerlib.ra._bloom_filter_contains': ( 'extended_ra_operations.html#_bloom_filter_contains',
+                                                                         'spannerlib/ra.py'),
+                               'spannerlib.ra._cached_outputs': ('extended_ra_operations.html#_cached_outputs', 'spannerlib/ra.py'),
+                               'spannerlib.ra._call_async_ie': ('extended_ra_operations.html#_call_async_ie', 'spannerlib/ra.py'),
+                               'spannerlib.ra._call_batches': ('extended_ra_operations.html#_call_batches', 'spannerlib/ra.py'),
+                               'spannerlib.ra._col_names': ('extended_ra_operations.html#_col_names', 'spannerlib/ra.py'),
+                               'spannerlib.ra._column_hashes': ('extended_ra_operations.html#_column_hashes', 'spannerlib/ra.py'),
+                               'spannerlib.ra._combine_hashes': ('extended_ra_operations.html#_combine_hashes', 'spannerlib/ra.py'),
+                               'spannerlib.ra._decode_spans': ('extended_ra_operations.html#_decode_spans', 'spannerlib/ra.py'),
+                               'spannerlib.ra._df_rows': ('extended_ra_operations.html#_df_rows', 'spannerlib/ra.py'),
+                               'spannerlib.ra._encode_spans': ('extended_ra_operations.html#_encode_spans', 'spannerlib/ra.py'),
+                               'spannerlib.ra._executor_outputs': ('extended_ra_operations.html#_executor_outputs', 'spannerlib/ra.py'),
+                               'spannerlib.ra._extension_counts': ('extended_ra_operations.html#_extension_counts', 'spannerlib/ra.py'),
+                               'spannerlib.ra._group_positions': ('extended_ra_operations.html#_group_positions', 'spannerlib/ra.py'),
+                               'spannerlib.ra._ie_chunk_task': ('extended_ra_operations.html#_ie_chunk_task', 'spannerlib/ra.py'),
+                               'spannerlib.ra._ie_outputs': ('extended_ra_operations.html#_ie_outputs', 'spannerlib/ra.py'),
+                               'spannerlib.ra._is_async_ie': ('extended_ra_operations.html#_is_async_ie', 'spannerlib/ra.py'),
+                               'spannerlib.ra._is_mergeable': ('extended_ra_operations.html#_is_mergeable', 'spannerlib/ra.py'),
+                               'spannerlib.ra._map_async': ('extended_ra_operations.html#_map_async', 'spannerlib/ra.py'),
+                               'spannerlib.ra._map_outputs': ('extended_ra_operations.html#_map_outputs', 'spannerlib/ra.py'),
+                               'spannerlib.ra._number_hashes': ('extended_ra_operations.html#_number_hashes', 'spannerlib/ra.py'),
+                               'spannerlib.ra._object_series': ('extended_ra_operations.html#_object_series', 'spannerlib/ra.py'),
+                               'spannerlib.ra._row_codes': ('extended_ra_operations.html#_row_codes', 'spannerlib/ra.py'),
+                               'spannerlib.ra._row_hashes': ('extended_ra_operations.html#_row_hashes', 'spannerlib/ra.py'),
+                               'spannerlib.ra._rows_equal': ('extended_ra_operations.html#_rows_equal', 'spannerlib/ra.py'),
+                               'spannerlib.ra._run_coroutine': ('extended_ra_operations.html#_run_coroutine', 'spannerlib/ra.py'),
+                               'spannerlib.ra.agg_states': ('extended_ra_operations.html#agg_states', 'spannerlib/ra.py'),
                                'spannerlib.ra.assert_ie_schema': ('extended_ra_operations.html#assert_ie_schema', 'spannerlib/ra.py'),
                                'spannerlib.ra.assert_iterable': ('extended_ra_operations.html#assert_iterable', 'spannerlib/ra.py'),
                                'spannerlib.ra.coerce_tuple_like': ('extended_ra_operations.html#coerce_tuple_like', 'spannerlib/ra.py'),
+                               'spannerlib.ra.compile_schema_check': ( 'extended_ra_operations.html#compile_schema_check',
+                                                                       'spannerlib/ra.py'),
                                'spannerlib.ra.difference': ('extended_ra_operations.html#difference', 'spannerlib/ra.py'),
+                               'spannerlib.ra.drop_duplicate_rows': ('extended_ra_operations.html#drop_duplicate_rows', 'spannerlib/ra.py'),
                                'spannerlib.ra.equalColTheta': ('extended_ra_operations.html#equalcoltheta', 'spannerlib/ra.py'),
                                'spannerlib.ra.equalColTheta.__call__': ( 'extended_ra_operations.html#equalcoltheta.__call__',
                                                                          'spannerlib/ra.py'),
@@ -265,6 +506,7 @@ d = { 'settings': { 'branch': 'master',
                                                                            'spannerlib/ra.py'),
                                'spannerlib.ra.equalConstTheta.__str__': ( 'extended_ra_operations.html#equalconsttheta.__str__',
                                                                           'spannerlib/ra.py'),
+                               'spannerlib.ra.finalize_agg_states': ('extended_ra_operations.html#finalize_agg_states', 'spannerlib/ra.py'),
                                'spannerlib.ra.get_const': ('extended_ra_operations.html#get_const', 'spannerlib/ra.py'),
                                'spannerlib.ra.groupby': ('extended_ra_operations.html#groupby', 'spannerlib/ra.py'),
                                'spannerlib.ra.ie_map': ('extended_ra_operations.html#ie_map', 'spannerlib/ra.py'),
@@ -272,25 +514,45 @@ d = { 'settings': { 'branch': 'master',
                                'spannerlib.ra.is_falsy': ('extended_ra_operations.html#is_falsy', 'spannerlib/ra.py'),
                                'spannerlib.ra.is_truthy': ('extended_ra_operations.html#is_truthy', 'spannerlib/ra.py'),
                                'spannerlib.ra.join': ('extended_ra_operations.html#join', 'spannerlib/ra.py'),
-                               'spannerlib.ra.map_iter': ('extended_ra_operations.html#map_iter', 'spannerlib/ra.py'),
+                               'spannerlib.ra.merge_agg_states': ('extended_ra_operations.html#merge_agg_states', 'spannerlib/ra.py'),
                                'spannerlib.ra.merge_rows': ('extended_ra_operations.html#merge_rows', 'spannerlib/ra.py'),
+                               'spannerlib.ra.monotone_union': ('extended_ra_operations.html#monotone_union', 'spannerlib/ra.py'),
+                               'spannerlib.ra.multiway_join': ('extended_ra_operations.html#multiway_join', 'spannerlib/ra.py'),
                                'spannerlib.ra.product': ('extended_ra_operations.html#product', 'spannerlib/ra.py'),
                                'spannerlib.ra.project': ('extended_ra_operations.html#project', 'spannerlib/ra.py'),
+                               'spannerlib.ra.relation_fingerprint': ( 'extended_ra_operations.html#relation_fingerprint',
+                                                                       'spannerlib/ra.py'),
                                'spannerlib.ra.rename': ('extended_ra_operations.html#rename', 'spannerlib/ra.py'),
                                'spannerlib.ra.select': ('extended_ra_operations.html#select', 'spannerlib/ra.py'),
+                               'spannerlib.ra.semijoin': ('extended_ra_operations.html#semijoin', 'spannerlib/ra.py'),
                                'spannerlib.ra.union': ('extended_ra_operations.html#union', 'spannerlib/ra.py')},
             'spannerlib.session': { 'spannerlib.session.Session': ('session.html#session', 'spannerlib/session.py'),
                                     'spannerlib.session.Session.__init__': ('session.html#session.__init__', 'spannerlib/session.py'),
                                     'spannerlib.session.Session._check_semantics': ( 'session.html#session._check_semantics',
                                                                                      'spannerlib/session.py'),
+                                    'spannerlib.session.Session._import_disk_rel': ( 'session.html#session._import_disk_rel',
+                                                                                     'spannerlib/session.py'),
                                     'spannerlib.session.Session._parse_code': ('session.html#session._parse_code', 'spannerlib/session.py'),
                                     'spannerlib.session.Session.clear': ('session.html#session.clear', 'spannerlib/session.py'),
                                     'spannerlib.session.Session.export': ('session.html#session.export', 'spannerlib/session.py'),
+                                    'spannerlib.session.Session.export_async': ( 'session.html#session.export_async',
+                                                                                 'spannerlib/session.py'),
                                     'spannerlib.session.Session.get_all_functions': ( 'session.html#session.get_all_functions',
                                                                                       'spannerlib/session.py'),
+                                    'spannerlib.session.Session.ie_cache_stats': ( 'session.html#session.ie_cache_stats',
+                                                                                   'spannerlib/session.py'),
+                                    'spannerlib.session.Session.ie_store_info': ( 'session.html#session.ie_store_info',
+                                                                                  'spannerlib/session.py'),
                                     'spannerlib.session.Session.import_rel': ('session.html#session.import_rel', 'spannerlib/session.py'),
+                                    'spannerlib.session.Session.import_rel_async': ( 'session.html#session.import_rel_async',
+                                                                                     'spannerlib/session.py'),
                                     'spannerlib.session.Session.import_var': ('session.html#session.import_var', 'spannerlib/session.py'),
+                                    'spannerlib.session.Session.load': ('session.html#session.load', 'spannerlib/session.py'),
                                     'spannerlib.session.Session.print_rules': ('session.html#session.print_rules', 'spannerlib/session.py'),
+                                    'spannerlib.session.Session.prometheus_stats': ( 'session.html#session.prometheus_stats',
+                                                                                     'spannerlib/session.py'),
+                                    'spannerlib.session.Session.purge_ie_store': ( 'session.html#session.purge_ie_store',
+                                                                                   'spannerlib/session.py'),
                                     'spannerlib.session.Session.register': ('session.html#session.register', 'spannerlib/session.py'),
                                     'spannerlib.session.Session.register_agg': ( 'session.html#session.register_agg',
                                                                                  'spannerlib/session.py'),
@@ -300,11 +562,16 @@ d = { 'settings': { 'branch': 'master',
                                     'spannerlib.session.Session.remove_relation': ( 'session.html#session.remove_relation',
                                                                                     'spannerlib/session.py'),
                                     'spannerlib.session.Session.remove_rule': ('session.html#session.remove_rule', 'spannerlib/session.py'),
+                                    'spannerlib.session.Session.save': ('session.html#session.save', 'spannerlib/session.py'),
+                                    'spannerlib.session.Session.stats': ('session.html#session.stats', 'spannerlib/session.py'),
+                                    'spannerlib.session.Session.warm_ie_store': ( 'session.html#session.warm_ie_store',
+                                                                                  'spannerlib/session.py'),
                                     'spannerlib.session._class_repr': ('session.html#_class_repr', 'spannerlib/session.py'),
                                     'spannerlib.session._display_result': ('session.html#_display_result', 'spannerlib/session.py'),
                                     'spannerlib.session._execute_statement': ('session.html#_execute_statement', 'spannerlib/session.py'),
                                     'spannerlib.session._format_results': ('session.html#_format_results', 'spannerlib/session.py'),
                                     'spannerlib.session._load_stdlib': ('session.html#_load_stdlib', 'spannerlib/session.py'),
+                                    'spannerlib.session._run_cancellable': ('session.html#_run_cancellable', 'spannerlib/session.py'),
                                     'spannerlib.session._sort_df': ('session.html#_sort_df', 'spannerlib/session.py'),
                                     'spannerlib.session._statement_type_and_value': ( 'session.html#_statement_type_and_value',
                                                                                       'spannerlib/session.py'),
@@ -332,6 +599,103 @@ d = { 'settings': { 'branch': 'master',
                                                                                               'spannerlib/spannerlog_magic.py'),
                                              'spannerlib.spannerlog_magic.spannerlogMagic.spannerlog': ( 'spannerlog_magic.html#spannerlogmagic.spannerlog',
                                                                                                          'spannerlib/spannerlog_magic.py')},
+            'spannerlib.sql_backend': { 'spannerlib.sql_backend.SQLBackend': ('sql_backend.html#sqlbackend', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend.SQLBackend.__init__': ( 'sql_backend.html#sqlbackend.__init__',
+                                                                                        'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend.SQLBackend._base_tables': ('sql_backend.html#sqlbackend._base_tables', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend.SQLBackend.close': ('sql_backend.html#sqlbackend.close', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend.SQLBackend.compute_node': ( 'sql_backend.html#sqlbackend.compute_node',
+                                                                                            'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend.SQLBackend.last_sql': ( 'sql_backend.html#sqlbackend.last_sql',
+                                                                                        'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._BaseTables': ('sql_backend.html#_basetables', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._BaseTables.__init__': ('sql_backend.html#_basetables.__init__', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._BaseTables.compact': ('sql_backend.html#_basetables.compact', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._BaseTables.load': ('sql_backend.html#_basetables.load', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._Block': ('sql_backend.html#_block', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._Block.__init__': ( 'sql_backend.html#_block.__init__',
+                                                                                    'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._Block.merge': ( 'sql_backend.html#_block.merge',
+                                                                                 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._Block.sql': ('sql_backend.html#_block.sql', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram': ('sql_backend.html#_sqlprogram', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.__init__': ( 'sql_backend.html#_sqlprogram.__init__',
+                                                                                         'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram._derived': ( 'sql_backend.html#_sqlprogram._derived',
+                                                                                         'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram._holds_objects': ( 'sql_backend.html#_sqlprogram._holds_objects',
+                                                                                               'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram._scan': ( 'sql_backend.html#_sqlprogram._scan',
+                                                                                      'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.arity': ( 'sql_backend.html#_sqlprogram.arity',
+                                                                                      'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.block': ( 'sql_backend.html#_sqlprogram.block',
+                                                                                      'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.compilable': ( 'sql_backend.html#_sqlprogram.compilable',
+                                                                                           'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.create_view': ( 'sql_backend.html#_sqlprogram.create_view',
+                                                                                            'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.drop': ('sql_backend.html#_sqlprogram.drop', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.execute': ( 'sql_backend.html#_sqlprogram.execute',
+                                                                                        'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.frame': ( 'sql_backend.html#_sqlprogram.frame',
+                                                                                      'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.insert': ('sql_backend.html#_sqlprogram.insert', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.recursive_sql': ( 'sql_backend.html#_sqlprogram.recursive_sql',
+                                                                                              'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.run': ( 'sql_backend.html#_sqlprogram.run',
+                                                                                    'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.stage': ( 'sql_backend.html#_sqlprogram.stage',
+                                                                                      'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._SQLProgram.store': ( 'sql_backend.html#_sqlprogram.store',
+                                                                                      'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._ValueCodec': ('sql_backend.html#_valuecodec', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._ValueCodec.__init__': ( 'sql_backend.html#_valuecodec.__init__',
+                                                                                         'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._ValueCodec.decode': ( 'sql_backend.html#_valuecodec.decode',
+                                                                                       'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._ValueCodec.encode': ( 'sql_backend.html#_valuecodec.encode',
+                                                                                       'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._ValueCodec.encode_column': ('sql_backend.html#_valuecodec.encode_column', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._ValueCodec.literal': ( 'sql_backend.html#_valuecodec.literal',
+                                                                                        'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._close_database': ('sql_backend.html#_close_database', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._relation_version': ('sql_backend.html#_relation_version', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._same_version': ('sql_backend.html#_same_version', 'spannerlib/sql_backend.py'),
+                                        'spannerlib.sql_backend._staged_outputs': ('sql_backend.html#_staged_outputs', 'spannerlib/sql_backend.py')},
+            'spannerlib.storage': { 'spannerlib.storage.DiskRelation': ('relation_storage.html#diskrelation', 'spannerlib/storage.py'),
+                                    'spannerlib.storage.DiskRelation.__init__': ( 'relation_storage.html#diskrelation.__init__',
+                                                                                  'spannerlib/storage.py'),
+                                    'spannerlib.storage.DiskRelation.__len__': ( 'relation_storage.html#diskrelation.__len__',
+                                                                                 'spannerlib/storage.py'),
+                                    'spannerlib.storage.DiskRelation.__repr__': ( 'relation_storage.html#diskrelation.__repr__',
+                                                                                  'spannerlib/storage.py'),
+                                    'spannerlib.storage.DiskRelation._chunk_paths': ( 'relation_storage.html#diskrelation._chunk_paths',
+                                                                                      'spannerlib/storage.py'),
+                                    'spannerlib.storage.DiskRelation.append': ( 'relation_storage.html#diskrelation.append',
+                                                                                'spannerlib/storage.py'),
+                                    'spannerlib.storage.DiskRelation.empty': ( 'relation_storage.html#diskrelation.empty',
+                                                                               'spannerlib/storage.py'),
+                                    'spannerlib.storage.DiskRelation.head': ( 'relation_storage.html#diskrelation.head',
+                                                                              'spannerlib/storage.py'),
+                                    'spannerlib.storage.DiskRelation.scan': ( 'relation_storage.html#diskrelation.scan',
+                                                                              'spannerlib/storage.py'),
+                                    'spannerlib.storage.DiskRelation.snapshot': ( 'relation_storage.html#diskrelation.snapshot',
+                                                                                  'spannerlib/storage.py'),
+                                    'spannerlib.storage._chunk_file_name': ( 'relation_storage.html#_chunk_file_name',
+                                                                             'spannerlib/storage.py'),
+                                    'spannerlib.storage._is_span_column': ( 'relation_storage.html#_is_span_column',
+                                                                            'spannerlib/storage.py'),
+                                    'spannerlib.storage._zero_copy_column': ('relation_storage.html#_zero_copy_column', 'spannerlib/storage.py'),
+                                    'spannerlib.storage.read_docs_file': ('relation_storage.html#read_docs_file', 'spannerlib/storage.py'),
+                                    'spannerlib.storage.read_relation_file': ( 'relation_storage.html#read_relation_file',
+                                                                               'spannerlib/storage.py'),
+                                    'spannerlib.storage.write_disk_relation': ( 'relation_storage.html#write_disk_relation',
+                                                                                'spannerlib/storage.py'),
+                                    'spannerlib.storage.write_docs_file': ( 'relation_storage.html#write_docs_file',
+                                                                            'spannerlib/storage.py'),
+                                    'spannerlib.storage.write_relation_file': ( 'relation_storage.html#write_relation_file',
+                                                                                'spannerlib/storage.py')},
             'spannerlib.term_graph': { 'spannerlib.term_graph._join_schema': ('term_graphs.html#_join_schema', 'spannerlib/term_graph.py'),
                                        'spannerlib.term_graph._rename_schema': ( 'term_graphs.html#_rename_schema',
                                                                                  'spannerlib/term_graph.py'),
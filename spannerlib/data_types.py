@@ -4,7 +4,7 @@
 
 # %% auto 0
 __all__ = ['logger', 'STRING_PATTERN', 'Var', 'FreeVar', 'RelationDefinition', 'Relation', 'IEFunction', 'AGGFunction',
-           'IERelation', 'Rule', 'pretty', 'isFloat', 'isInt']
+           'MergeableAGG', 'IERelation', 'Rule', 'pretty', 'isFloat', 'isInt']
 
 # %% ../nbs/006_primitive_data_types.ipynb 3
 from abc import ABC, abstractmethod
@@ -14,6 +14,7 @@ from collections import defaultdict
 import pandas as pd
 from pathlib import Path
 from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union
+from concurrent.futures import Executor
 from pydantic import BaseModel
 import networkx as nx
 import itertools
@@ -59,6 +60,21 @@ class IEFunction(BaseModel):
     # either a fixed schema, or a callable that takes the expected arity and given us the schema
     in_schema: Union[List,Callable] 
     out_schema: Union[List,Callable]
+    # number of input rows that a coroutine function or async generator is called on concurrently, None for the default of `ie_map`
+    max_concurrency: Optional[int] = None
+    # if True, func is called on a list of input tuples and returns (index,output) pairs, where index is the position of the input in the list
+    batch: bool = False
+    # a process or thread pool that computes chunks of the input rows, None to use the executor of the engine
+    executor: Optional[Executor] = None
+    # an `IECache` of the outputs of input rows, shared by all queries, None to call func on every input row
+    cache: Optional[Any] = None
+    # an `IEResultStore` that keeps the outputs of func across runs, under the version of func
+    store: Optional[Any] = None
+    version: Optional[str] = None
+    # how input and output rows are checked against the schemas, one of 'full','first','sampled','off', None for the default of `ie_map`
+    validation: Optional[str] = None
+    # if True, func is called once per distinct input row of a query, and its outputs are repeated for equal rows
+    dedupe: bool = True
 
 
 class AGGFunction(BaseModel):
@@ -68,6 +84,24 @@ class AGGFunction(BaseModel):
     in_schema: List 
     out_schema: List
 
+class MergeableAGG(BaseModel):
+    """An aggregation given by partial states, so that it can be computed over batches of rows and the results combined.
+    init returns an empty state, update(state,values) adds a series of values to a state,
+    merge(state1,state2) combines two states and finalize(state) returns the aggregated value.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    init: Callable
+    update: Callable
+    merge: Callable
+    finalize: Optional[Callable] = None
+
+    def __call__(self,values):
+        # aggregates all values at once, so a MergeableAGG can be used wherever a plain aggregation function is expected
+        return self.finalize_state(self.update(self.init(),values))
+
+    def finalize_state(self,state):
+        return state if self.finalize is None else self.finalize(state)
+
 class IERelation(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
     name: str
@@ -112,7 +146,7 @@ def pretty(obj):
     else:
         return str(obj)
 
-# %% ../nbs/006_primitive_data_types.ipynb 10
+# %% ../nbs/006_primitive_data_types.ipynb 11
 import re
 STRING_PATTERN = re.compile(r"^[^\r\n]+$")
 
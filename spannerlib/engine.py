@@ -3,7 +3,8 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/010_engine.ipynb.
 
 # %% auto 0
-__all__ = ['logger', 'op_to_func', 'DB', 'Engine', 'get_rel', 'compute_acyclic_node', 'compute_recursive_node', 'compute_node']
+__all__ = ['logger', 'MONOTONE_AGGS', 'op_to_func', 'pandas_backend', 'DB', 'ReadWriteLock', 'Engine', 'get_rel', 'Backend',
+           'compute_acyclic_node', 'compute_recursive_component', 'compute_node']
 
 # %% ../nbs/010_engine.ipynb 3
 from abc import ABC, abstractmethod
@@ -12,10 +13,18 @@ from collections import defaultdict
 
 import pandas as pd
 from pathlib import Path
+import tempfile
+import shutil
+import pickle
 from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union
 from pydantic import BaseModel
 import networkx as nx
 import itertools
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from concurrent.futures import CancelledError
 import logging
 logger = logging.getLogger(__name__)
 
@@ -49,13 +58,24 @@ from spannerlib.ra import (
     intersection,
     difference,
     join,
+    multiway_join,
+    semijoin,
     product,
     groupby,
+    monotone_union,
     ie_map,
-    merge_rows
+    merge_rows,
+    RowSet,
+    relation_fingerprint,
+    IECache,
+    _df_rows
 )
 
 from .term_graph import graph_compose, merge_term_graphs_pair,rule_to_graph,add_relation,add_project_uniq_free_vars
+from .storage import DiskRelation,write_relation_file,read_relation_file,write_docs_file,read_docs_file
+from .memory import MemoryBudget,relation_nbytes,row_set_nbytes
+from .metrics import FunctionStats
+from .opt import push_selections_into_scans,push_projections_into_scans,use_multiway_joins,semijoin_reduce
 
 
 
@@ -72,12 +92,142 @@ class DB(dict):
         key_str=', '.join(self.keys())
         return f'DB({key_str})'
 
+# %% ../nbs/010_engine.ipynb 8
+class ReadWriteLock():
+    """A lock that lets many readers hold it together, or a single writer.
+    Waiting writers block new readers, so a steady stream of queries can not starve writers.
+    The writer can acquire the lock again, both for reading and for writing, while it holds it,
+    and a reader can acquire it again for reading even while writers wait, since they wait for it to release the lock."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        # the number of read locks held by each reading thread
+        self._reader_depths = defaultdict(int)
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        with self._cond:
+            is_writer = self._writer==me
+            if not is_writer:
+                if self._reader_depths[me]==0:
+                    while self._writer is not None or self._waiting_writers>0:
+                        self._cond.wait()
+                    self._readers += 1
+                self._reader_depths[me] += 1
+        try:
+            yield
+        finally:
+            if not is_writer:
+                with self._cond:
+                    self._reader_depths[me] -= 1
+                    if self._reader_depths[me]==0:
+                        del self._reader_depths[me]
+                        self._readers -= 1
+                        if self._readers==0:
+                            self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer!=me:
+                self._waiting_writers += 1
+                while self._writer is not None or self._readers>0:
+                    self._cond.wait()
+                self._waiting_writers -= 1
+                self._writer = me
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_depth -= 1
+                if self._writer_depth==0:
+                    self._writer = None
+                    self._cond.notify_all()
+
+def _writes(method):
+    """runs an `Engine` method while holding the write lock of the engine"""
+    @functools.wraps(method)
+    def locked(self,*args,**kwargs):
+        with self.lock.write():
+            return method(self,*args,**kwargs)
+    return locked
+
 # %% ../nbs/010_engine.ipynb 9
+# aggregations that can be used in recursive rules, and the order in which their values move as more facts are derived.
+# counts of sets only grow, so the largest count of a group is its final value.
+MONOTONE_AGGS = {
+    'min':'min',
+    'max':'max',
+    'count':'max',
+}
+
+def _head_aggregations(g,top):
+    """returns the aggregation names of each head column of the rule whose top node is top, or None if the head is not aggregated"""
+    data = g.nodes[top]
+    if data['op']=='groupby':
+        return data['agg']
+    # constants in the head are added by a product with the aggregated free vars, followed by a project
+    if data['op']=='project':
+        product = next(iter(g.successors(top)))
+        if g.nodes[product]['op']=='product':
+            source = next(iter(g.successors(product)))
+            if g.nodes[source]['op']=='groupby':
+                agg_by_var = dict(zip(g.nodes[source]['schema'],g.nodes[source]['agg']))
+                return [agg_by_var.get(col) for col in data['schema']]
+    return None
+
+def _mark_monotone_unions(g):
+    """turns the unions of recursive relations with aggregated heads into monotone unions,
+    that keep a single row per group by merging the values of all of the relation's rules.
+    Raises a ValueError if a recursive relation uses an aggregation that is not monotone."""
+    recursive_nodes = set(itertools.chain.from_iterable(
+        component for component in nx.strongly_connected_components(g) if len(component)>1))
+    for u,data in g.nodes(data=True):
+        if data.get('op')!='union' or u not in recursive_nodes:
+            continue
+        head_aggs = [aggs for aggs in (_head_aggregations(g,v) for v in g.successors(u)) if aggs is not None]
+        if len(head_aggs)==0:
+            continue
+        if any(aggs!=head_aggs[0] for aggs in head_aggs):
+            raise ValueError(f"the rules of the recursive relation {u} aggregate different columns: {head_aggs}")
+        non_monotone = [name for name in head_aggs[0] if name is not None and name not in MONOTONE_AGGS]
+        if len(non_monotone)>0:
+            raise ValueError(f"the recursive relation {u} uses the aggregations {non_monotone}, "
+                             f"but only {list(MONOTONE_AGGS)} can be used in recursive rules")
+        data['op'] = 'monotone_union'
+        data['lattice'] = [MONOTONE_AGGS[name] if name is not None else None for name in head_aggs[0]]
+
+# %% ../nbs/010_engine.ipynb 11
 from copy import deepcopy
 class Engine():
-    def __init__(self,rewrites=None):
+    def __init__(self,rewrites=None,backend=None,memory_budget=None,spill_dir=None,ie_executor=None,semijoin_reduction=False):
         if rewrites is None:
-            self.rewrites = []
+            rewrites = [push_selections_into_scans,push_projections_into_scans,use_multiway_joins]
+        # semi joins reduce the inputs of joins over acyclic rule bodies to the rows that are joined
+        if semijoin_reduction and semijoin_reduce not in rewrites:
+            rewrites = list(rewrites)+[semijoin_reduce]
+        self.rewrites = rewrites
+        # the backend implementing the relational operators, None for the default pandas backend
+        self.backend = backend
+        # the number of bytes that relations and intermediate results can hold in memory, None for no limit
+        self.memory_budget = memory_budget
+        # directory that intermediate results are spilled to when the memory budget is exceeded
+        if memory_budget is not None and spill_dir is None:
+            spill_dir = tempfile.mkdtemp(prefix='spannerlib_spill_')
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True,exist_ok=True)
+        # a process or thread pool that computes IE functions, unless they set their own, None to compute them in the calling thread
+        self.ie_executor = ie_executor
+        # queries plan against a snapshot taken under the read lock and execute without holding it,
+        # methods that change relations, rules or functions hold the write lock
+        self.lock = ReadWriteLock()
         self.symbol_table={
             # key : type,val
         }
@@ -90,6 +240,9 @@ class Engine():
 
         self.agg_functions={
         }
+        self.function_stats={
+            # (kind,name) : FunctionStats of the calls of the IE ('ie') or aggregation ('agg') function name
+        }
 
         self.term_graph = nx.DiGraph()
         
@@ -97,8 +250,14 @@ class Engine():
         self.rule_counter = itertools.count()
 
         self.db = DB(
-            # relation_name: dataframe
+            # relation_name: dataframe or DiskRelation
         )
+        self.row_sets = {
+            # relation_name: (dataframe, RowSet of its rows)
+        }
+        self.relation_sizes = {
+            # relation_name: (dataframe, its size in bytes, the documents of its spans by id), see `relation_nbytes`
+        }
 
         # lets skip this for now and keep it a an attribute in the node graph
         self.rules_to_ids = {
@@ -112,6 +271,7 @@ class Engine():
         # }
     
 
+    @_writes
     def set_var(self,var_name,value,read_from_file=False):
         symbol_table = self.symbol_table
         if var_name in symbol_table:
@@ -124,12 +284,14 @@ class Engine():
     def get_var(self,var_name):
         return self.symbol_table.get(var_name,None)
     
+    @_writes
     def del_var(self,var_name):
         del self.symbol_table[var_name]
 
     def get_relation(self,rel_name:str):
         return self.Relation_defs.get(rel_name,None)
 
+    @_writes
     def set_relation(self,rel_def:RelationDefinition):
         if rel_def.name in self.Relation_defs:
             existing_def = self.Relation_defs[rel_def.name]
@@ -150,32 +312,128 @@ class Engine():
 
     def add_fact(self,fact:Relation):
         facts = pd.DataFrame([fact.terms])
-        self.db[fact.name] = merge_rows(self.db[fact.name],facts)
+        self.add_facts(fact.name,facts)
 
+    @_writes
     def add_facts(self,rel_name,facts:pd.DataFrame):
-        self.db[rel_name] = merge_rows(self.db[rel_name],facts)
-
+        if isinstance(self.db[rel_name],DiskRelation):
+            self.db[rel_name].append(facts)
+        else:
+            existing = self.db[rel_name]
+            # the row set is only valid as long as the relation was not replaced since it was built
+            if rel_name not in self.row_sets or self.row_sets[rel_name][0] is not existing:
+                self.row_sets[rel_name] = (existing,RowSet(existing))
+            row_set = self.row_sets.pop(rel_name)[1]
+            new_facts = row_set.new_rows(facts)
+            merged = row_set.df
+            self.db[rel_name] = merged
+            # only the size of the new facts is computed, if the size of the existing ones is known
+            size = self.relation_sizes.get(rel_name)
+            if size is not None and size[0] is existing:
+                _,nbytes,docs = size
+                self.relation_sizes[rel_name] = (merged,nbytes+relation_nbytes(new_facts,docs),docs)
+            # reinserting the row set keeps row sets ordered from least to most recently used
+            self.row_sets[rel_name] = (merged,row_set)
+        self._enforce_memory_budget()
+
+    def _relation_nbytes(self,rel_name)->int:
+        """the size of rel_name, which is computed again only if the relation was replaced since its size was kept"""
+        rel_data = self.db[rel_name]
+        size = self.relation_sizes.get(rel_name)
+        if size is None or size[0] is not rel_data:
+            docs = {}
+            size = (rel_data,relation_nbytes(rel_data,docs),docs)
+            self.relation_sizes[rel_name] = size
+        return size[1]
+
+    def memory_usage(self)->Dict[str,int]:
+        """returns the estimated number of bytes held in memory by each relation, including the row set built for it"""
+        usage = {rel_name:self._relation_nbytes(rel_name) for rel_name in self.db}
+        for rel_name,(rel_data,row_set) in self.row_sets.items():
+            usage[rel_name] = usage.get(rel_name,0)+row_set_nbytes(row_set)
+        return usage
+
+    def _ie_caches(self)->List[IECache]:
+        caches = {id(ie_func.cache):ie_func.cache for ie_func in self.ie_functions.values() if ie_func.cache is not None}
+        return list(caches.values())
+
+    def _total_memory_usage(self)->int:
+        """the bytes held by relations, their row sets and the caches of IE functions"""
+        return sum(self.memory_usage().values()) + sum(cache.nbytes for cache in self._ie_caches())
+
+    def _evict_ie_caches(self,usage:int)->int:
+        """drops the least recently used outputs of IE caches until usage fits in the memory budget, returning the usage left"""
+        for cache in self._ie_caches():
+            if usage<=self.memory_budget:
+                break
+            usage -= cache.shrink(max(cache.nbytes-(usage-self.memory_budget),0))
+        return usage
+
+    def _enforce_memory_budget(self):
+        """evicts the caches of IE functions and then row sets, least recently used first, until the relations in memory fit in the memory budget.
+        Base relations are the only copy of their facts, so they are never evicted,
+        relations that do not fit in memory should be stored on disk with `set_disk_relation`."""
+        if self.memory_budget is None:
+            return
+        usage = self._evict_ie_caches(self._total_memory_usage())
+        # row sets only speed up adding facts and can be rebuilt
+        for rel_name in list(self.row_sets):
+            if usage<=self.memory_budget:
+                return
+            logger.debug(f"evicting the row set of {rel_name} to stay within the memory budget")
+            usage -= row_set_nbytes(self.row_sets.pop(rel_name)[1])
+        if usage>self.memory_budget:
+            logger.warning(f"relations hold {usage} bytes in memory, more than the memory budget of {self.memory_budget} bytes")
+
+    @_writes
+    def set_disk_relation(self,rel_name,disk_rel:DiskRelation):
+        """stores the facts of rel_name on disk in disk_rel, moving any facts that are already in memory to disk"""
+        existing = self.db[rel_name]
+        if isinstance(existing,pd.DataFrame) and not existing.empty:
+            disk_rel.append(existing)
+        self.db[rel_name] = disk_rel
+
+    @_writes
     def del_fact(self,fact:Relation):
+        if isinstance(self.db[fact.name],DiskRelation):
+            raise ValueError(f"Can not delete facts from relation {fact.name} since it is stored on disk")
         self.db[fact.name] = _pd_drop_row(df = self.db[fact.name],row_vals=fact.terms)
 
     def get_ie_function(self,name:str):
         return self.ie_functions.get(name,None)
 
+    @_writes
     def set_ie_function(self,ie_func:IEFunction):
+        # the cached outputs of a function that is registered again may be stale
+        existing = self.ie_functions.get(ie_func.name)
+        if existing is not None and existing.cache is not None and existing.cache is not ie_func.cache:
+            existing.cache.clear()
         self.ie_functions[ie_func.name]=ie_func
 
+    def get_function_stats(self,kind:str,name:str)->FunctionStats:
+        """returns the `FunctionStats` of the IE ('ie') or aggregation ('agg') function name, creating it on first use.
+        Stats are kept when the function is registered again."""
+        key = (kind,name)
+        if key not in self.function_stats:
+            self.function_stats.setdefault(key,FunctionStats(name,kind=kind))
+        return self.function_stats[key]
+
+    @_writes
     def del_ie_function(self,name:str):
         del self.ie_functions[name]
 
     def get_agg_function(self,name:str):
         return self.agg_functions.get(name,None)
     
+    @_writes
     def set_agg_function(self,agg_func:AGGFunction):
         self.agg_functions[agg_func.name]=agg_func
     
+    @_writes
     def del_agg_function(self,name:str):
         del self.agg_functions[name]
 
+    @_writes
     def add_rule(self,rule:Rule,schema:RelationDefinition=None):
         if not self.get_relation(rule.head.name) and schema is None:
             raise ValueError(f"Relation {rule.head.name} not defined before adding the rule with it's head\n"
@@ -199,6 +457,7 @@ class Engine():
         self.term_graph = merge_term_graph
         
 
+    @_writes
     def del_rule(self,rule_str:str):
         #TODO here we need to save rules by their head and when removing the last rule of a head, remove its definition from db as well
         if not rule_str in self.rules_to_ids:
@@ -226,6 +485,7 @@ class Engine():
             
         return
 
+    @_writes
     def del_head(self,head_name:str):
         """Deletes all rules whose head is head_name
         """
@@ -233,12 +493,79 @@ class Engine():
         for rule_str in rules_to_delete:
             self.del_rule(rule_str)
 
+    @_writes
+    def save(self,path):
+        """Saves the relations, rules and variables of the engine to the directory path.
+        In memory relations are written as memory mappable arrow files, relations stored on disk are saved by reference.
+        The names of the saved relations are kept in the engine state, so files of relations from earlier saves to path are not loaded.
+        IE and aggregation functions are not saved, and should be registered again after loading.
+        """
+        path = Path(path)
+        (path/'relations').mkdir(parents=True,exist_ok=True)
+        docs = {}
+        disk_relations = {}
+        memory_relations = []
+        for rel_name,rel_data in self.db.items():
+            if isinstance(rel_data,DiskRelation):
+                disk_relations[rel_name] = str(rel_data.path.absolute())
+            else:
+                write_relation_file(rel_data,path/'relations'/f'{rel_name}.arrow',docs)
+                memory_relations.append(rel_name)
+        write_docs_file(docs,path/'docs.arrow')
+
+        # read the rule counter without advancing it
+        next_rule_id = next(self.rule_counter)
+        self.rule_counter = itertools.count(next_rule_id)
+        state = {
+            'symbol_table':self.symbol_table,
+            'Relation_defs':self.Relation_defs,
+            'term_graph':self.term_graph,
+            'rules_to_ids':self.rules_to_ids,
+            'head_to_rules':self.head_to_rules,
+            'next_rule_id':next_rule_id,
+            'disk_relations':disk_relations,
+            'memory_relations':memory_relations,
+        }
+        with open(path/'engine.pkl','wb') as f:
+            pickle.dump(state,f)
+
+    @_writes
+    def load(self,path):
+        """Loads relations, rules and variables saved by `Engine.save` into the engine, replacing its current ones.
+        Registered IE and aggregation functions are kept.
+        """
+        path = Path(path)
+        with open(path/'engine.pkl','rb') as f:
+            state = pickle.load(f)
+        docs = read_docs_file(path/'docs.arrow')
+
+        self.symbol_table = state['symbol_table']
+        self.Relation_defs = state['Relation_defs']
+        self.term_graph = state['term_graph']
+        self.rules_to_ids = state['rules_to_ids']
+        self.head_to_rules = state['head_to_rules']
+        self.rule_counter = itertools.count(state['next_rule_id'])
+        self.db = DB()
+        for rel_name,disk_path in state['disk_relations'].items():
+            self.db[rel_name] = DiskRelation(disk_path)
+        for rel_name in state['memory_relations']:
+            self.db[rel_name] = read_relation_file(path/'relations'/f'{rel_name}.arrow',docs)
+
+    def snapshot_db(self)->DB:
+        """returns a copy of the db that is not affected by later changes to the engine.
+        Dataframes in the db are never changed in place so they are shared, disk relations are limited to their current chunks."""
+        with self.lock.read():
+            return DB({rel_name:rel_data.snapshot() if isinstance(rel_data,DiskRelation) else rel_data
+                       for rel_name,rel_data in self.db.items()})
+
     def _inline_db_and_ies_in_graph(self,g:nx.DiGraph):
         g=deepcopy(g)
+        db = self.snapshot_db()
+        _mark_monotone_unions(g)
         for u in g.nodes:
             if g.out_degree(u)==0 and 'rel' in g.nodes[u]:
                 g.nodes[u]['op'] = 'get_rel'
-                g.nodes[u]['db'] = self.db
+                g.nodes[u]['db'] = db
                 g.nodes[u]['schema'] = _col_names(len(self.Relation_defs[g.nodes[u]['rel']].scheme))
             elif g.nodes[u]['op'] == 'ie_map':
                 ie_func_name = g.nodes[u]['func']
@@ -247,42 +574,78 @@ class Engine():
                 g.nodes[u]['name'] = ie_definition.name
                 g.nodes[u]['in_schema'] = ie_definition.in_schema
                 g.nodes[u]['out_schema'] = ie_definition.out_schema
+                g.nodes[u]['max_concurrency'] = ie_definition.max_concurrency
+                g.nodes[u]['batch'] = ie_definition.batch
+                g.nodes[u]['executor'] = ie_definition.executor if ie_definition.executor is not None else self.ie_executor
+                g.nodes[u]['cache'] = ie_definition.cache
+                g.nodes[u]['store'] = ie_definition.store
+                g.nodes[u]['store_version'] = ie_definition.version
+                g.nodes[u]['validation'] = ie_definition.validation
+                g.nodes[u]['dedupe'] = ie_definition.dedupe
+                g.nodes[u]['stats'] = self.get_function_stats('ie',ie_func_name)
             elif g.nodes[u]['op'] == 'groupby':
                 aggregate_func_names = g.nodes[u]['agg']
                 aggregate_funcs = [self.agg_functions[name].func if name is not None else None for name in aggregate_func_names]
                 g.nodes[u]['agg'] = aggregate_funcs
+                g.nodes[u]['agg_stats'] = [self.get_function_stats('agg',name) for name in dict.fromkeys(aggregate_func_names) if name is not None]
         return g
 
 
     def plan_query(self,q_rel:Relation,rewrites=None):
         if rewrites is None:
             rewrites = self.rewrites
-        query_graph = self._inline_db_and_ies_in_graph(self.term_graph)
+        # the query graph is a snapshot of the term graph and db, so it can be executed while the engine changes
+        with self.lock.read():
+            query_graph = self._inline_db_and_ies_in_graph(self.term_graph)
 
-        # get the sub term graph induced by the relation head
-        root_node = q_rel.name
-        connected_nodes = list(nx.shortest_path(query_graph,root_node).keys())
-        query_graph = nx.DiGraph(nx.subgraph(query_graph,connected_nodes))
-        
-        # add selects renames etc based on the query relation
-        root_node,_ = add_relation(query_graph,name='query',terms=q_rel.terms,source=root_node)
+            # get the sub term graph induced by the relation head
+            root_node = q_rel.name
+            connected_nodes = list(nx.shortest_path(query_graph,root_node).keys())
+            query_graph = nx.DiGraph(nx.subgraph(query_graph,connected_nodes))
+
+            # add selects renames etc based on the query relation
+            root_node,_ = add_relation(query_graph,name='query',terms=q_rel.terms,source=root_node)
 
-        # TODO for all rewrites, run them
+            for rewrite in rewrites:
+                query_graph = rewrite(query_graph,self)
         return query_graph,root_node
 
-    def execute_plan(self,query_graph,root_node,return_intermediate=False):
-        results = compute_node(query_graph,root_node,ret_inter = return_intermediate)
+    def execute_plan(self,query_graph,root_node,return_intermediate=False,cancel=None):
+        backend = self.backend if self.backend is not None else pandas_backend
+        memory = None
+        if self.memory_budget is not None:
+            # intermediate results can use whatever the relations in memory leave of the budget
+            with self.lock.read():
+                free_bytes = max(self.memory_budget-self._evict_ie_caches(self._total_memory_usage()),0)
+            # every query spills to its own directory, so concurrent queries do not overwrite each other's files
+            memory = MemoryBudget(free_bytes,spill_dir=tempfile.mkdtemp(prefix='query_',dir=self.spill_dir))
+        try:
+            results = backend.compute_node(query_graph,root_node,ret_inter = return_intermediate,memory=memory,cancel=cancel)
+            if memory is not None and return_intermediate:
+                # spilled intermediate results are read back, since their files are removed with the query's directory
+                memory.load_all(results[1])
+        finally:
+            if memory is not None:
+                shutil.rmtree(memory.spill_dir,ignore_errors=True)
+        if self.memory_budget is not None:
+            # IE caches grow while queries run
+            with self.lock.read():
+                self._evict_ie_caches(self._total_memory_usage())
         return results
 
-    def run_query(self,q:Relation,rewrites=None,return_intermediate=False):
+    def run_query(self,q:Relation,rewrites=None,return_intermediate=False,cancel=None):
         query_graph,root_node = self.plan_query(q,rewrites)
-        return self.execute_plan(query_graph,root_node,return_intermediate=return_intermediate)
+        return self.execute_plan(query_graph,root_node,return_intermediate=return_intermediate,cancel=cancel)
 
 
-# %% ../nbs/010_engine.ipynb 29
-def get_rel(rel,db,**kwargs):
+# %% ../nbs/010_engine.ipynb 32
+def get_rel(rel,db,columns=None,filters=None,**kwargs):
     # helper function to get the relation from the db for external relations
-    return db[rel]
+    # relations stored on disk are scanned lazily, reading only the given columns and the rows matching the filters
+    rel_data = db[rel]
+    if isinstance(rel_data,DiskRelation):
+        return rel_data.scan(columns=columns,filters=filters)
+    return rel_data
 
 op_to_func = {
     'union':union,
@@ -292,134 +655,201 @@ op_to_func = {
     'project':project,
     'rename':rename,
     'join':join,
+    'multiway_join':multiway_join,
+    'semijoin':semijoin,
     'ie_map':ie_map,
     'get_rel':get_rel,
     'get_const':get_const,
     'product':product,
-    'groupby':groupby
+    'groupby':groupby,
+    'monotone_union':monotone_union
 }
 
-# %% ../nbs/010_engine.ipynb 30
-def _in_cycle(g):
-    return list(set(
-        itertools.chain.from_iterable(nx.cycles.simple_cycles(g))
-    ))
-
-def _depends_on_cycle(g):
-    in_cycle_nodes = _in_cycle(g)
-    depends_on_cycle = {
-        node for node in g.nodes if node in in_cycle_nodes or 
-        len(set(nx.descendants(g,node)).intersection(in_cycle_nodes))>0
-    }
-    return depends_on_cycle
-
-# %% ../nbs/010_engine.ipynb 31
-def _collect_children_and_run(G,u,results,stack,log=False):
+class Backend(dict):
+    """A backend maps each operator name in a query graph to the function that implements it.
+    Operator functions get the results of the node's children as positional arguments and the node's data as keyword arguments.
+    Backends can override some of the operators and inherit the rest from the pandas reference implementation.
+    """
+    def __init__(self,name='pandas',**ops):
+        super().__init__(op_to_func)
+        self.update(ops)
+        self.name = name
+
+    def __repr__(self):
+        return f'Backend({self.name})'
+
+    def compute_node(self,G,root,ret_inter=False,memory=None,cancel=None):
+        """computes the result of root in the query graph G, keeping intermediate results within the `MemoryBudget` memory if it is given,
+        and stopping with a `CancelledError` once the `threading.Event` cancel is set.
+        Backends that execute whole query graphs rather than single operators override this method."""
+        return compute_node(G,root,ret_inter=ret_inter,backend=self,memory=memory,cancel=cancel)
+
+    def compute_recursive_component(self,G,component,results,memory=None,cancel=None):
+        """computes the nodes of a strongly connected component of G until a fixed point is reached, adding their results to results.
+        Backends that evaluate recursion other than by iterating the operators of the component override this method."""
+        return compute_recursive_component(G,component,results,backend=self,memory=memory,cancel=cancel)
+
+pandas_backend = Backend()
+
+# %% ../nbs/010_engine.ipynb 33
+def _collect_children_and_run(G,u,results,stack,log=False,backend=None,memory=None,op_func=None):
     children = list(G.successors(u))
     u_data = G.nodes[u]
 
-    children_results = [results[v][-1] for v in children]
-    op_func = op_to_func[u_data['op']]
+    if memory is None:
+        children_results = [results[v][-1] for v in children]
+    else:
+        children_results = [memory.load(results,v) for v in children]
+    if backend is None:
+        backend = pandas_backend
+    if op_func is None:
+        op_func = backend[u_data['op']]
 
     if log:
         logger.debug(f"computing node {u} with children {children} and data {u_data} , stack = {stack}")
         logger.debug(f"children results are {children_results}")
         logger.debug(f"children_data is {[G.nodes[v] for v in children]}")
+    # aggregations are timed as a whole, and their latency is recorded for each of their aggregation functions
+    agg_stats = u_data.get('agg_stats')
+    start = time.perf_counter()
     try:
         res = op_func(*children_results,**u_data)
     except Exception as e:
+        for stats in agg_stats or []:
+            stats.record_error()
         raise Exception(f'During excution of node {u} with args {children_results} and kwargs {u_data}'
                         f' got error {e}'
         )
+    if agg_stats:
+        elapsed = time.perf_counter()-start
+        in_rows = len(children_results[0]) if children_results[0] is not None else 0
+        for stats in agg_stats:
+            stats.record_call(elapsed)
+            stats.record_rows(in_rows,len(res))
     if log:
         logger.debug(f"result of node {u} is {res}")
-    results[u].append(res)
+    if memory is None:
+        results[u].append(res)
+    else:
+        # with a memory budget only the latest result of each node is kept
+        results[u] = [res]
+        memory.track(results,u)
     return res
 
 
-# %% ../nbs/010_engine.ipynb 32
-def compute_acyclic_node(G,u,results,stack=None):
-    res = _collect_children_and_run(G,u,results,[])
+# %% ../nbs/010_engine.ipynb 34
+def _check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise CancelledError("query execution was cancelled")
+
+def compute_acyclic_node(G,u,results,stack=None,backend=None,memory=None):
+    res = _collect_children_and_run(G,u,results,[],backend=backend,memory=memory)
     logger.debug(f"setting {u} to final since it is acyclic\n")
     G.nodes[u]['final'] = True
     return res
 
-def compute_recursive_node(G,u,results,stack=None):
-
-    if stack is None:
-        stack = []
-
-    children = list(G.successors(u))
-    u_data = G.nodes[u]
-    op_func = op_to_func[u_data['op']]
-
-    if u_data.get('final',False):
-        return results[u][-1]    
-
-
-    logger.debug(f"computing node {u} with stack {stack}")
-
-
-    went_in_a_cycle = u in stack
-    if went_in_a_cycle:
-        logger.debug(f"went in a cycle at {u}, computing op with empty children if necessary\n")
-        # for each child that doesnt have data, put an empty df instead of it
-        res = _collect_children_and_run(G,u,results,stack,log=True)
-        return res
-
-    # if we are here we are in a cycle but didnt return to an old position yet
-    # then we compute all our children first
-    for v in children:
-        stack.append(u)
-        compute_recursive_node(G,v,results,stack)
-        stack.pop()
-
-    # compute and mark as final if reached fixed point
-    res = _collect_children_and_run(G,u,results,stack,log=True)
-
-    all_children_final = all(G.nodes[v].get('final',False) for v in children)
-    fixed_point_reached = len(results[u])>1 and results[u][-1].equals(results[u][-2])
-
-    if all_children_final:
-        logger.debug(f"setting {u} to final since all children are final\n")
-        G.nodes[u]['final'] = True
-    elif fixed_point_reached:
-        logger.debug(f"setting {u} to final since fixed point has been achieved\n")
-        # if u==9:
-        #     logger.debug(f"graph nodes are{g.nodes(data=True)}")
+class _IEDelta():
+    """Computes an ie_map node of a recursive component only on the input rows that are new since the previous iterations,
+    appending their outputs to the outputs of the earlier iterations.
+    Input rows are keyed like `IECache` keys, and if some of them can not be keyed the whole input is computed."""
+    def __init__(self,op_func):
+        self.op_func = op_func
+        self.outputs = None
+        # the positions in outputs of the output rows of each input row seen so far
+        self.positions = {}
+
+    def __call__(self,df,in_arity,**kwargs):
+        if df is None or df.empty or self.positions is None:
+            return self.op_func(df,in_arity=in_arity,**kwargs)
+        keys = [IECache.key(row) for row in _df_rows(df)]
+        if any(key is None for key in keys):
+            return self.op_func(df,in_arity=in_arity,**kwargs)
+        is_new = [key not in self.positions for key in keys]
+        if any(is_new):
+            new_outputs = self.op_func(df[is_new],in_arity=in_arity,**kwargs)
+            offset = 0 if self.outputs is None else len(self.outputs)
+            new_keys = {key for key,new in zip(keys,is_new) if new}
+            for key in new_keys:
+                self.positions[key] = []
+            for position,row in enumerate(_df_rows(new_outputs.iloc[:,:in_arity]),offset):
+                key = IECache.key(row)
+                if key not in new_keys:
+                    # values that are not equal to themselves, like NaN, can not be matched to their outputs
+                    self.positions = None
+                    return self.op_func(df,in_arity=in_arity,**kwargs)
+                self.positions[key].append(position)
+            if self.outputs is None:
+                self.outputs = new_outputs
+            else:
+                self.outputs = pd.concat([self.outputs,new_outputs],ignore_index=True)
+        if len(self.positions) == len(set(keys)):
+            # the input holds every row seen so far, which is always the case for monotone rules
+            return self.outputs
+        positions = [position for key in dict.fromkeys(keys) for position in self.positions[key]]
+        return self.outputs.iloc[positions].reset_index(drop=True)
+
+def compute_recursive_component(G,component,results,backend=None,memory=None,cancel=None):
+    """computes the nodes of a strongly connected component of the query graph until a fixed point is reached.
+    Every iteration computes each node of the component once, children before parents except along the edges that close a cycle,
+    and the fixed point is reached when an iteration does not change the result of any node.
+    IE functions in the component are called only on input rows they were not called on in earlier iterations,
+    unless they are registered without dedupe."""
+    order = list(nx.dfs_postorder_nodes(nx.subgraph(G,component)))
+    ie_map_op = (pandas_backend if backend is None else backend)['ie_map']
+    ie_deltas = {u:_IEDelta(ie_map_op) for u in order if G.nodes[u].get('op')=='ie_map' and G.nodes[u].get('dedupe',True)}
+    iteration = 0
+    while True:
+        logger.debug(f"computing iteration {iteration} of the recursive nodes {order}")
+        changed = False
+        for u in order:
+            _check_cancelled(cancel)
+            res = _collect_children_and_run(G,u,results,[],log=True,backend=backend,memory=memory,op_func=ie_deltas.get(u))
+            # compare fingerprints rather than the dataframes, so that changes in the order of rows
+            # or in dtypes between iterations do not hide the fixed point
+            fingerprint = relation_fingerprint(res)
+            if G.nodes[u].get('fingerprint') != fingerprint:
+                changed = True
+            G.nodes[u]['fingerprint'] = fingerprint
+        iteration += 1
+        if not changed:
+            break
+    logger.debug(f"setting {order} to final since fixed point has been achieved after {iteration} iterations\n")
+    for u in component:
         G.nodes[u]['final'] = True
-    else:
-        logger.debug(f"{u} not final yet so we will need to run another iteration\n")
 
-    return res
 
-
-
-def compute_node(G,root,ret_inter=False):
+def compute_node(G,root,ret_inter=False,backend=None,memory=None,cancel=None):
+    """computes the result of root in the query graph G.
+    If a `MemoryBudget` is given, only the latest result of each node is kept, results are released once all of their parents are computed,
+    and results are spilled to disk when they exceed the budget.
+    If the `threading.Event` cancel is set, computation stops before the next node with a `CancelledError`."""
 
     # makes sure there is always a last value in the list for each key
     # which is None
     list_with_none_factory = lambda : [None]
     results_dict = defaultdict(list_with_none_factory)
 
-    depends_on_cycle = _depends_on_cycle(G)
-    not_depends_on_cycle = [u for u in G.nodes if u not in depends_on_cycle]
-
-    # compute non cyclic nodes in postorder
-    non_cycle_topological_sort = list(nx.topological_sort(nx.DiGraph(nx.subgraph(G,not_depends_on_cycle))))
-    for u in non_cycle_topological_sort[::-1]:
-        compute_acyclic_node(G,u,results_dict)
-
-    logger.debug(f"the following nodes were computed non cyclically {non_cycle_topological_sort}")
-    # now that all initial conditions for recursions are set
-    # run the compute_recursive_node on u
-    logger.debug(f"running compute_recursive_node on {root}")
-
-    while True:
-        res = compute_recursive_node(G,root,results_dict)
-        if G.nodes[root].get('final',False):
-            break
-
+    # compute the strongly connected components of the graph in postorder,
+    # nodes that are not in a cycle are computed once and cycles are computed until they reach a fixed point
+    condensation = nx.condensation(G)
+    for c in reversed(list(nx.topological_sort(condensation))):
+        component = condensation.nodes[c]['members']
+        u = next(iter(component))
+        _check_cancelled(cancel)
+        if len(component)==1 and not G.has_edge(u,u):
+            compute_acyclic_node(G,u,results_dict,backend=backend,memory=memory)
+        else:
+            (pandas_backend if backend is None else backend).compute_recursive_component(G,component,results_dict,memory=memory,cancel=cancel)
+        if memory is not None and not ret_inter:
+            children = {v for u in component for v in G.successors(u)} - component
+            for v in children:
+                if v!=root and all(G.nodes[p].get('final',False) for p in G.predecessors(v)):
+                    memory.release(results_dict,v)
+
+    if memory is None:
+        res = results_dict[root][-1]
+    else:
+        res = memory.load(results_dict,root)
     if ret_inter:
         return res,results_dict
     else:
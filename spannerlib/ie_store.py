@@ -0,0 +1,171 @@
+"""A persistent store of the outputs of IE functions, shared across runs and processes"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/015_ie_result_store.ipynb.
+
+# %% auto 0
+__all__ = ['logger', 'IEResultStore']
+
+# %% ../nbs/015_ie_result_store.ipynb 3
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import functools
+import threading
+import pandas as pd
+from pathlib import Path
+from collections import defaultdict
+from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union
+import logging
+logger = logging.getLogger(__name__)
+
+from .span import Span
+from .ra import _encode_spans,_decode_spans
+
+# %% ../nbs/015_ie_result_store.ipynb 6
+def _doc_hash(doc,doc_hashes:Dict)->str:
+    """the content hash of doc, cached in doc_hashes by the id of the document"""
+    if id(doc) not in doc_hashes:
+        doc_hashes[id(doc)] = hashlib.sha256(str(doc).encode()).hexdigest()
+    return doc_hashes[id(doc)]
+
+def _input_hash(in_row,doc_hashes:Dict)->str:
+    """hashes the content of in_row, spans are hashed by the hash of their document, cached in doc_hashes by the id of the document"""
+    h = hashlib.sha256()
+    for value in in_row:
+        if isinstance(value,Span):
+            part = ('Span',_doc_hash(value.doc,doc_hashes),value.start,value.end)
+        else:
+            part = (type(value).__name__,value)
+        h.update(repr(part).encode())
+    return h.hexdigest()
+
+class IEResultStore():
+    """A persistent store of the outputs of IE functions in a SQLite database at path,
+    keyed by the name the function is registered under, a version string and the content hash of the input row.
+    """
+    def __init__(self,
+        path:Union[str,Path], # path of the database file, created if it does not exist
+        timeout:float=60, # seconds to wait for other processes that are writing to the store
+        ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True,exist_ok=True)
+        self.timeout = timeout
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS ie_results (
+            func TEXT, version TEXT, input_hash TEXT, outputs BLOB, created REAL,
+            PRIMARY KEY (func,version,input_hash))""")
+        conn.commit()
+
+    def __repr__(self):
+        return f"IEResultStore({self.path})"
+
+    def __getstate__(self):
+        # connections can not be sent to other processes, each process opens its own
+        return {'path':self.path,'timeout':self.timeout}
+
+    def __setstate__(self,state):
+        self.path = state['path']
+        self.timeout = state['timeout']
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite connections can not be shared between threads or forked processes
+        if getattr(self._local,'pid',None)!=os.getpid():
+            self._local.conn = sqlite3.connect(self.path,timeout=self.timeout)
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def get_many(self,func_id:str,version:str,input_hashes:List[str])->Dict[str,bytes]:
+        """returns the stored outputs of the given input hashes, as a dict from input hash to the pickled outputs"""
+        conn = self._connection()
+        found = {}
+        unique_hashes = list(dict.fromkeys(input_hashes))
+        # sqlite limits the number of parameters of a statement
+        for i in range(0,len(unique_hashes),500):
+            chunk = unique_hashes[i:i+500]
+            rows = conn.execute(
+                f"SELECT input_hash,outputs FROM ie_results WHERE func=? AND version=? AND input_hash IN ({','.join('?'*len(chunk))})",
+                [func_id,version,*chunk])
+            found.update(rows)
+        return found
+
+    def put_many(self,func_id:str,version:str,entries:Dict[str,bytes]):
+        """stores the pickled outputs of each input hash in entries, keeping outputs that other processes already stored"""
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO ie_results VALUES (?,?,?,?,?)",
+                [(func_id,version,input_hash,outputs,now) for input_hash,outputs in entries.items()])
+
+    def outputs(self,func_id:str,version:str,compute:Callable,in_rows):
+        """yields the (in_row,out_row) pairs of in_rows, reading the outputs of stored input rows of the function named func_id
+        and computing and storing the outputs of the rest with compute, which maps a list of input rows to (in_row,out_row) pairs"""
+        in_rows = list(in_rows)
+        doc_hashes = {}
+        hashes = [_input_hash(in_row,doc_hashes) for in_row in in_rows]
+        # documents are keyed by their content, like input hashes, so the documents of equal input rows are indexed equally
+        # even if one run holds a single document object where another holds equal copies of it
+        doc_key = functools.partial(_doc_hash,doc_hashes=doc_hashes)
+        stored = self.get_many(func_id,version,hashes)
+        # inputs that are repeated in in_rows are computed once
+        missing = {}
+        for in_row,input_hash in zip(in_rows,hashes):
+            if input_hash not in stored:
+                missing.setdefault(input_hash,in_row)
+        logger.debug(f"computing {len(missing)} of {len(in_rows)} inputs of {func_id} version {version}, the rest are stored")
+        computed = defaultdict(list)
+        for in_row,out_row in compute(list(missing.values())):
+            computed[id(in_row)].append(out_row)
+
+        new_entries = {}
+        for input_hash,in_row in missing.items():
+            docs = {}
+            _encode_spans([in_row],docs,doc_key=doc_key)
+            n_in_docs = len(docs)
+            out_rows = _encode_spans(computed[id(in_row)],docs,doc_key=doc_key)
+            new_docs = [doc for _,doc in list(docs.values())[n_in_docs:]]
+            new_entries[input_hash] = pickle.dumps((out_rows,new_docs))
+        if len(new_entries)>0:
+            self.put_many(func_id,version,new_entries)
+        stored.update(new_entries)
+
+        for in_row,input_hash in zip(in_rows,hashes):
+            # output spans are rebuilt on the documents of the input row
+            docs = {}
+            _encode_spans([in_row],docs,doc_key=doc_key)
+            out_rows,new_docs = pickle.loads(stored[input_hash])
+            for out_row in _decode_spans(out_rows,[doc for _,doc in docs.values()]+new_docs):
+                yield in_row,out_row
+
+    def info(self)->pd.DataFrame:
+        """returns the number of stored input rows of each function and version, and when they were last stored"""
+        rows = self._connection().execute(
+            "SELECT func,version,COUNT(*),MAX(created) FROM ie_results GROUP BY func,version ORDER BY func,version").fetchall()
+        info = pd.DataFrame(rows,columns=['func','version','inputs','last_stored'])
+        info['last_stored'] = pd.to_datetime(info['last_stored'],unit='s')
+        return info
+
+    def purge(self,
+        func_id:Optional[str]=None, # the name of the function whose outputs are removed, all functions if None
+        version:Optional[str]=None, # the version of the function whose outputs are removed, all versions if None
+        keep_version:Optional[str]=None, # if given, removes the outputs of all versions of the function except for this one
+        )->int:
+        """removes stored outputs, returning the number of input rows whose outputs were removed"""
+        conditions,params = [],[]
+        if func_id is not None:
+            conditions.append("func=?")
+            params.append(func_id)
+        if version is not None:
+            conditions.append("version=?")
+            params.append(version)
+        if keep_version is not None:
+            conditions.append("version!=?")
+            params.append(keep_version)
+        where = f"WHERE {' AND '.join(conditions)}" if len(conditions)>0 else ""
+        conn = self._connection()
+        with conn:
+            return conn.execute(f"DELETE FROM ie_results {where}",params).rowcount
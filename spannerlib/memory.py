@@ -0,0 +1,137 @@
+"""Accounting for the memory held by relations, and spilling them to disk to stay within a budget"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/011_memory_budget.ipynb.
+
+# %% auto 0
+__all__ = ['logger', 'relation_nbytes', 'row_set_nbytes', 'SpilledRelation', 'MemoryBudget']
+
+# %% ../nbs/011_memory_budget.ipynb 3
+import sys
+import itertools
+import tempfile
+import pandas as pd
+from pathlib import Path
+from collections import OrderedDict
+from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union
+import logging
+logger = logging.getLogger(__name__)
+
+from .span import Span
+from .ra import RowSet
+from .storage import DiskRelation,write_relation_file,read_relation_file
+
+# %% ../nbs/011_memory_budget.ipynb 6
+def relation_nbytes(df,docs:Optional[Dict]=None)->int:
+    """estimates the memory held by a relation, including the python objects it holds.
+    The documents of spans are counted once, no matter how many spans point into them.
+    If docs is given, the documents in it are not counted and the documents of df are added to it,
+    so the sizes of rows that are added to a relation can be summed with the size of the relation."""
+    if df is None or isinstance(df,DiskRelation):
+        return 0
+    if docs is None:
+        docs = {}
+    total = int(df.memory_usage(index=True,deep=True).sum())
+    new_docs = {}
+    for i in range(df.shape[1]):
+        values = df.iloc[:,i]
+        if values.dtype==object and len(values)>0 and isinstance(values.iloc[0],Span):
+            new_docs.update((id(span.doc),span.doc) for span in values if isinstance(span,Span) and id(span.doc) not in docs)
+    docs.update(new_docs)
+    return total + sum(sys.getsizeof(doc) for doc in new_docs.values())
+
+def row_set_nbytes(row_set:RowSet)->int:
+    """the memory held by the hash index of a `RowSet`, its rows are the rows of its relation"""
+    return row_set.hashes.nbytes + row_set.positions.nbytes
+
+# %% ../nbs/011_memory_budget.ipynb 9
+class SpilledRelation():
+    """A relation that was moved from memory to an arrow file, it is read back with `load`."""
+    def __init__(self,path:Path,columns:List,docs:Dict):
+        self.path = path
+        self.columns = list(columns)
+        self.docs = docs
+
+    def __repr__(self):
+        return f"SpilledRelation({self.path})"
+
+    def load(self)->pd.DataFrame:
+        docs_by_id = sorted(self.docs,key=self.docs.get)
+        return read_relation_file(self.path,docs_by_id).set_axis(self.columns,axis=1)
+
+class MemoryBudget():
+    """Keeps the intermediate results of a query within max_bytes.
+    Results are tracked in least recently used order, and when they exceed the budget
+    the least recently used results are spilled to arrow files in spill_dir, and read back when they are used again.
+    """
+    def __init__(self,
+        max_bytes:int, # the memory that intermediate results can hold
+        spill_dir:Union[str,Path]=None, # directory to spill results to, defaults to a temporary directory
+        ):
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self.sizes = OrderedDict()
+        # documents of spilled spans, shared by all spilled results
+        self.docs = {}
+        self.spilled = 0
+        self._file_counter = itertools.count()
+
+    @property
+    def nbytes(self):
+        return sum(self.sizes.values())
+
+    def track(self,results,key):
+        """accounts for the latest result of key in results, spilling other results if the budget is exceeded"""
+        self.sizes[key] = relation_nbytes(results[key][-1])
+        self.sizes.move_to_end(key)
+        self._evict(results,keep=key)
+
+    def load(self,results,key):
+        """returns the latest result of key in results, reading it back if it was spilled"""
+        res = results[key][-1]
+        if isinstance(res,SpilledRelation):
+            logger.debug(f"reading the result of {key} back from {res.path}")
+            res = res.load()
+            results[key][-1] = res
+            self.track(results,key)
+        elif key in self.sizes:
+            self.sizes.move_to_end(key)
+        return res
+
+    def load_all(self,results):
+        """reads every spilled result in results back into memory, regardless of the budget"""
+        for key,res in results.items():
+            if isinstance(res[-1],SpilledRelation):
+                res[-1] = res[-1].load()
+
+    def release(self,results,key):
+        """drops the result of key, once it is no longer needed"""
+        results[key] = [None]
+        self.sizes.pop(key,None)
+
+    def _evict(self,results,keep):
+        for key in list(self.sizes):
+            if self.nbytes<=self.max_bytes:
+                return
+            if key==keep:
+                continue
+            spilled = self._spill(results[key][-1])
+            if spilled is not None:
+                logger.debug(f"spilled the result of {key} to {spilled.path}")
+                results[key][-1] = spilled
+                del self.sizes[key]
+
+    def _spill(self,df):
+        if df is None or len(df)==0 or len(df.columns)==0:
+            return None
+        if self.spill_dir is None:
+            self.spill_dir = Path(tempfile.mkdtemp(prefix='spannerlib_spill_'))
+        self.spill_dir.mkdir(parents=True,exist_ok=True)
+        path = self.spill_dir/f'{next(self._file_counter)}.arrow'
+        try:
+            write_relation_file(df,path,self.docs)
+        except ValueError as e:
+            # relations of arbitrary python objects can not be written to disk, so they stay in memory
+            logger.debug(f"can not spill relation: {e}")
+            return None
+        self.spilled += 1
+        return SpilledRelation(path,df.columns,self.docs)
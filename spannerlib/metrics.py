@@ -0,0 +1,187 @@
+"""Counters of the calls, rows, errors and latency of IE and aggregation functions"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/016_function_stats.ipynb.
+
+# %% auto 0
+__all__ = ['logger', 'LATENCY_SAMPLES', 'LATENCY_PERCENTILES', 'FunctionStats', 'stats_frame', 'prometheus_text']
+
+# %% ../nbs/016_function_stats.ipynb 3
+import time
+import random
+import inspect
+import threading
+import functools
+import pandas as pd
+from collections.abc import Iterator
+from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union,Iterable
+import logging
+logger = logging.getLogger(__name__)
+
+# %% ../nbs/016_function_stats.ipynb 6
+# number of call latencies kept by each `FunctionStats` to estimate percentiles from
+LATENCY_SAMPLES = 1024
+# latency percentiles reported by `stats_frame` and `prometheus_text`
+LATENCY_PERCENTILES = (0.5,0.9,0.99)
+
+class FunctionStats():
+    """Counters of the calls of an IE or aggregation function, that many threads can update concurrently.
+    Latencies of up to `LATENCY_SAMPLES` calls are kept as a uniform sample of all calls, using reservoir sampling.
+    """
+    def __init__(self,
+        name:str, # name of the function
+        kind:str='ie', # 'ie' for IE functions and 'agg' for aggregation functions
+        ):
+        self.name = name
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        self.calls = 0
+        self.in_rows = 0
+        self.out_rows = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.samples = []
+
+    def __repr__(self):
+        return f"FunctionStats({self.kind},{self.name},calls={self.calls},errors={self.errors},total_time={self.total_time:.6f})"
+
+    def __getstate__(self):
+        # stats are sent back from the workers of IE executors, without their lock
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _add_sample(self,seconds):
+        if len(self.samples) < LATENCY_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            i = int(self._random.random()*self.calls)
+            if i < LATENCY_SAMPLES:
+                self.samples[i] = seconds
+
+    def record_call(self,seconds:float):
+        with self._lock:
+            self.calls += 1
+            self.total_time += seconds
+            self._add_sample(seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_rows(self,in_rows:int,out_rows:int):
+        with self._lock:
+            self.in_rows += in_rows
+            self.out_rows += out_rows
+
+    def merge(self,other:'FunctionStats'):
+        """adds the counters of other, like the stats of a worker process, to these stats"""
+        with self._lock:
+            self.in_rows += other.in_rows
+            self.out_rows += other.out_rows
+            self.errors += other.errors
+            self.total_time += other.total_time
+            self.calls += other.calls
+            for seconds in other.samples:
+                self._add_sample(seconds)
+
+    def timed(self,func:Callable)->Callable:
+        """wraps func so that each call records its latency, or an error if it raises.
+        Outputs that are iterators, like those of generator functions, are read into lists since they do their work while iterated,
+        and async generators are turned into coroutine functions that return lists."""
+        if inspect.isasyncgenfunction(func):
+            async def timed_func(*args):
+                start = time.perf_counter()
+                try:
+                    output = [out_row async for out_row in func(*args)]
+                except Exception:
+                    self.record_error()
+                    raise
+                self.record_call(time.perf_counter()-start)
+                return output
+        elif inspect.iscoroutinefunction(func):
+            async def timed_func(*args):
+                start = time.perf_counter()
+                try:
+                    output = await func(*args)
+                except Exception:
+                    self.record_error()
+                    raise
+                self.record_call(time.perf_counter()-start)
+                return output
+        else:
+            def timed_func(*args):
+                start = time.perf_counter()
+                try:
+                    output = func(*args)
+                    if not isinstance(output,(list,tuple)) and isinstance(output,Iterator):
+                        output = list(output)
+                except Exception:
+                    self.record_error()
+                    raise
+                self.record_call(time.perf_counter()-start)
+                return output
+        return functools.wraps(func)(timed_func)
+
+    def percentile(self,q:float)->float:
+        """estimates the q-th quantile of the latency of calls, for q between 0 and 1, NaN if there were no calls"""
+        with self._lock:
+            samples = sorted(self.samples)
+        if len(samples)==0:
+            return float('nan')
+        return samples[min(len(samples)-1,int(q*len(samples)))]
+
+    def as_dict(self)->Dict[str,Any]:
+        stats = {'kind':self.kind,'name':self.name,'calls':self.calls,'in_rows':self.in_rows,'out_rows':self.out_rows,
+                 'errors':self.errors,'total_seconds':self.total_time,
+                 'mean_seconds':self.total_time/self.calls if self.calls>0 else float('nan')}
+        for q in LATENCY_PERCENTILES:
+            stats[f'p{q*100:g}_seconds'] = self.percentile(q)
+        return stats
+
+# %% ../nbs/016_function_stats.ipynb 12
+def stats_frame(stats:Iterable[FunctionStats])->pd.DataFrame:
+    """returns a dataframe with a row of counters for each of stats, sorted by total latency"""
+    columns = ['kind','name','calls','in_rows','out_rows','errors','total_seconds','mean_seconds']
+    columns += [f'p{q*100:g}_seconds' for q in LATENCY_PERCENTILES]
+    df = pd.DataFrame([s.as_dict() for s in stats],columns=columns)
+    return df.sort_values('total_seconds',ascending=False,ignore_index=True)
+
+def _prometheus_label(value)->str:
+    return str(value).replace('\\','\\\\').replace('"','\\"').replace('\n','\\n')
+
+def _prometheus_value(value)->str:
+    return 'NaN' if value!=value else str(value)
+
+def prometheus_text(stats:Iterable[FunctionStats],
+    prefix:str='spannerlib', # prefix of the metric names
+    )->str:
+    """formats stats in the Prometheus text exposition format.
+    Calls, rows and errors are counters and latency is a summary, all labeled by the kind and name of the function"""
+    stats = list(stats)
+    metrics = [
+        ('function_calls_total','counter','Calls of IE and aggregation functions',lambda s:s.calls),
+        ('function_input_rows_total','counter','Input rows given to IE and aggregation functions',lambda s:s.in_rows),
+        ('function_output_rows_total','counter','Output rows of IE and aggregation functions',lambda s:s.out_rows),
+        ('function_errors_total','counter','Calls of IE and aggregation functions that raised an exception',lambda s:s.errors),
+    ]
+    lines = []
+    for metric,metric_type,help_text,value in metrics:
+        lines.append(f'# HELP {prefix}_{metric} {help_text}')
+        lines.append(f'# TYPE {prefix}_{metric} {metric_type}')
+        for s in stats:
+            lines.append(f'{prefix}_{metric}{{kind="{s.kind}",name="{_prometheus_label(s.name)}"}} {value(s)}')
+    metric = f'{prefix}_function_latency_seconds'
+    lines.append(f'# HELP {metric} Latency of calls of IE and aggregation functions')
+    lines.append(f'# TYPE {metric} summary')
+    for s in stats:
+        labels = f'kind="{s.kind}",name="{_prometheus_label(s.name)}"'
+        for q in LATENCY_PERCENTILES:
+            lines.append(f'{metric}{{{labels},quantile="{q:g}"}} {_prometheus_value(s.percentile(q))}')
+        lines.append(f'{metric}_sum{{{labels}}} {s.total_time}')
+        lines.append(f'{metric}_count{{{labels}}} {s.calls}')
+    return '\n'.join(lines)+'\n'
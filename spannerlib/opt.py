@@ -3,7 +3,213 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/025_query_optimizations.ipynb.
 
 # %% auto 0
-__all__ = []
+__all__ = ['logger', 'push_selections_into_scans', 'push_projections_into_scans', 'use_multiway_joins', 'semijoin_reduce']
 
 # %% ../nbs/025_query_optimizations.ipynb 5
-# TODO imports
+import pandas as pd
+import networkx as nx
+import itertools
+import logging
+logger = logging.getLogger(__name__)
+
+from .utils import get_new_node_name
+from .ra import equalConstTheta
+from .storage import DiskRelation
+
+# %% ../nbs/025_query_optimizations.ipynb 9
+def _is_disk_scan(g,u):
+    data = g.nodes[u]
+    return data.get('op')=='get_rel' and isinstance(data['db'][data['rel']],DiskRelation)
+
+def _replace_child(g,u,old_child,new_child):
+    """replaces the edge u->old_child with u->new_child, keeping the order of u's children"""
+    children = list(g.successors(u))
+    g.remove_edges_from([(u,v) for v in children])
+    g.add_edges_from([(u,new_child if v==old_child else v) for v in children])
+
+def _private_scan(g,scan,parent):
+    """returns a scan node that is read only by parent, copying scan if it is shared with other nodes"""
+    if g.in_degree(scan)==1:
+        return scan
+    new_scan = get_new_node_name(g)
+    g.add_node(new_scan,**g.nodes[scan])
+    _replace_child(g,parent,scan,new_scan)
+    return new_scan
+
+# %% ../nbs/025_query_optimizations.ipynb 10
+def push_selections_into_scans(g,engine=None):
+    """folds selects on constants that read directly from a disk relation into the scan of the relation
+    so that only the matching rows are read from disk"""
+    for scan in [u for u in g.nodes if _is_disk_scan(g,u)]:
+        select_nodes = list(g.predecessors(scan))
+        for select_node in select_nodes:
+            select_data = g.nodes[select_node]
+            if select_data.get('op')!='select' or not isinstance(select_data['theta'],equalConstTheta):
+                continue
+            scan_data = g.nodes[scan]
+            filters = [(scan_data['schema'][pos],val) for pos,val in select_data['theta'].pos_val_tuples]
+            logger.debug(f"pushing select {select_node} into the scan of {scan_data['rel']}")
+            # the select node becomes a filtered scan of the relation
+            g.remove_edge(select_node,scan)
+            rule_id = select_data.get('rule_id')
+            select_data.clear()
+            select_data.update(scan_data)
+            select_data['filters'] = scan_data.get('filters',[])+filters
+            if rule_id is not None:
+                select_data['rule_id'] = rule_id
+        if len(select_nodes)>0 and g.in_degree(scan)==0:
+            g.remove_node(scan)
+    return g
+
+def _columns_read_by_parents(g,u):
+    """returns the columns of u that are read by its parents, or None if all of them might be read.
+    Looks through parents that are projects, and joins that are only read by projects."""
+    u_columns = g.nodes[u]['schema']
+    needed = set()
+    for p in g.predecessors(u):
+        p_data = g.nodes[p]
+        join_readers = list(g.predecessors(p))
+        if p_data.get('op')=='project':
+            needed |= set(p_data['schema'])
+        elif (p_data.get('op')=='join' and len(join_readers)>0 and
+              all(g.nodes[r].get('op')=='project' for r in join_readers)):
+            other_columns = set(itertools.chain.from_iterable(g.nodes[v]['schema'] for v in g.successors(p) if v!=u))
+            join_keys = set(u_columns) & other_columns
+            needed |= join_keys | set(itertools.chain.from_iterable(g.nodes[r]['schema'] for r in join_readers))
+        else:
+            return None
+    return needed
+
+def _narrow_project(g,project_node):
+    """drops columns of a project node that are not read by its parents, updating the schema of joins reading it"""
+    needed = _columns_read_by_parents(g,project_node)
+    schema = g.nodes[project_node]['schema']
+    if needed is None:
+        return schema
+    narrowed = [col for col in schema if col in needed]
+    if len(narrowed)==0 or len(narrowed)==len(schema):
+        return schema
+    g.nodes[project_node]['schema'] = narrowed
+    for p in g.predecessors(project_node):
+        if g.nodes[p]['op']=='join':
+            child_columns = set(itertools.chain.from_iterable(g.nodes[v]['schema'] for v in g.successors(p)))
+            g.nodes[p]['schema'] = [col for col in g.nodes[p]['schema'] if col in child_columns]
+    return narrowed
+
+def push_projections_into_scans(g,engine=None):
+    """makes scans of disk relations read only the columns that are used by the nodes reading them.
+    Applies to scans that are renamed and then projected, which is how relations are read in rule bodies."""
+    for scan in [u for u in g.nodes if _is_disk_scan(g,u)]:
+        for rename_node in list(g.predecessors(scan)):
+            if g.nodes[rename_node].get('op')!='rename':
+                continue
+            projects = list(g.predecessors(rename_node))
+            if len(projects)==0 or any(g.nodes[p].get('op')!='project' for p in projects):
+                continue
+            needed = set(itertools.chain.from_iterable(_narrow_project(g,p) for p in projects))
+            rename_schema = g.nodes[rename_node]['schema']
+            keep = [i for i,name in enumerate(rename_schema) if name in needed]
+            # if no columns are needed we still need to know whether the relation is empty
+            if len(keep)==len(rename_schema) or len(keep)==0:
+                continue
+            private_scan = _private_scan(g,scan,rename_node)
+            scan_data = g.nodes[private_scan]
+            logger.debug(f"pruning the scan of {scan_data['rel']} to columns {keep}")
+            scan_columns = scan_data.get('columns',scan_data['schema'])
+            scan_data['columns'] = [scan_columns[i] for i in keep]
+            scan_data['schema'] = scan_data['columns']
+            g.nodes[rename_node]['schema'] = [rename_schema[i] for i in keep]
+    return g
+
+# %% ../nbs/025_query_optimizations.ipynb 17
+def _is_inner_join(g,u):
+    """checks whether u is a join that is read only by another join"""
+    parents = list(g.predecessors(u))
+    return g.nodes[u].get('op')=='join' and len(parents)==1 and g.nodes[parents[0]].get('op')=='join'
+
+def _join_tree(g,top):
+    """returns the inner joins and the inputs of the tree of joins rooted at top, with inputs ordered from left to right.
+    Child joins that are read by other nodes as well, such as the inputs of ie functions, are treated as inputs."""
+    inner_joins,inputs = [],[]
+    for v in g.successors(top):
+        if _is_inner_join(g,v):
+            v_inner_joins,v_inputs = _join_tree(g,v)
+            inner_joins += [v]+v_inner_joins
+            inputs += v_inputs
+        else:
+            inputs.append(v)
+    return inner_joins,inputs
+
+def _gyo_join_tree(edges):
+    """returns the parent of each hyperedge in a join tree of the given hyperedges, in the order in which GYO reduction removes them.
+    Roots have a parent of None. Returns None if the hyperedges are cyclic."""
+    edges = [set(edge) for edge in edges]
+    remaining = list(range(len(edges)))
+    parents = []
+    while len(remaining)>1:
+        for i in remaining:
+            others = [j for j in remaining if j!=i]
+            shared = edges[i] & set().union(*(edges[j] for j in others))
+            # i is an ear if the variables it shares with the rest are all in a single witness edge
+            witness = next((j for j in others if shared<=edges[j]),None)
+            if witness is not None:
+                parents.append((i,witness if len(shared)>0 else None))
+                remaining.remove(i)
+                break
+        else:
+            return None
+    parents += [(i,None) for i in remaining]
+    return parents
+
+def _is_acyclic(edges):
+    """checks whether the hypergraph with the given hyperedges is alpha acyclic using GYO reduction"""
+    return _gyo_join_tree(edges) is not None
+
+def use_multiway_joins(g,engine=None):
+    """replaces trees of joins whose inputs form a cyclic join with a single multiway_join node over all of the inputs"""
+    tops = [u for u,data in g.nodes(data=True) if data.get('op')=='join' and not _is_inner_join(g,u)]
+    for top in tops:
+        inner_joins,inputs = _join_tree(g,top)
+        inputs = list(dict.fromkeys(inputs))
+        if len(inputs)<3 or _is_acyclic([g.nodes[v]['schema'] for v in inputs]):
+            continue
+        logger.debug(f"replacing the joins under {top} with a multiway join of {inputs}")
+        g.remove_nodes_from(inner_joins)
+        g.remove_edges_from(list(g.out_edges(top)))
+        g.nodes[top]['op'] = 'multiway_join'
+        g.add_edges_from([(top,v) for v in inputs])
+    return g
+
+# %% ../nbs/025_query_optimizations.ipynb 21
+def semijoin_reduce(g,engine=None,bloom_min_rows=None):
+    """filters the inputs of trees of joins over acyclic bodies with semi joins, so that they hold only the rows that are joined.
+    Semi joins summarize relations with at least bloom_min_rows rows with bloom filters."""
+    tops = [u for u,data in g.nodes(data=True) if data.get('op')=='join' and not _is_inner_join(g,u)]
+    for top in tops:
+        inner_joins,inputs = _join_tree(g,top)
+        inputs = list(dict.fromkeys(inputs))
+        if len(inputs)<3:
+            continue
+        join_tree = _gyo_join_tree([g.nodes[v]['schema'] for v in inputs])
+        if join_tree is None:
+            continue
+        logger.debug(f"adding semi joins to the inputs of the joins under {top}")
+        reduced = list(inputs)
+        def add_semijoin(i,j):
+            semijoin_node = get_new_node_name(g)
+            g.add_node(semijoin_node,op='semijoin',schema=g.nodes[inputs[i]]['schema'],bloom_min_rows=bloom_min_rows)
+            g.add_edge(semijoin_node,reduced[i])
+            g.add_edge(semijoin_node,reduced[j])
+            reduced[i] = semijoin_node
+        # reduce parents by their children, from the leaves up, and then children by their reduced parents
+        for i,parent in join_tree:
+            if parent is not None:
+                add_semijoin(parent,i)
+        for i,parent in reversed(join_tree):
+            if parent is not None:
+                add_semijoin(i,parent)
+        for join_node in [top]+inner_joins:
+            for v in list(g.successors(join_node)):
+                if v in inputs:
+                    _replace_child(g,join_node,v,reduced[inputs.index(v)])
+    return g
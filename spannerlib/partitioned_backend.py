@@ -0,0 +1,313 @@
+"""Hash partitioned parallel execution of relational operators on a pool of worker processes"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/014_partitioned_backend.ipynb.
+
+# %% auto 0
+__all__ = ['logger', 'PartitionedBackend']
+
+# %% ../nbs/014_partitioned_backend.ipynb 3
+import os
+import pickle
+import multiprocessing
+import numpy as np
+import pandas as pd
+import networkx as nx
+from concurrent.futures import ProcessPoolExecutor
+from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union
+import logging
+logger = logging.getLogger(__name__)
+
+from spannerlib.ra import (
+    is_truthy,
+    is_falsy,
+    rename,
+    union,
+    intersection,
+    difference,
+    join,
+    product,
+    groupby,
+    _is_mergeable,
+    agg_states,
+    merge_agg_states,
+    finalize_agg_states,
+    _row_hashes,
+    RowSet,
+)
+from .engine import Backend,DB,compute_node,_collect_children_and_run,_check_cancelled
+
+# %% ../nbs/014_partitioned_backend.ipynb 6
+def _partition(df,keys,n_partitions):
+    """splits df into n_partitions by the hash of the key columns, so that rows with equal keys end up in the same partition.
+    Keys are hashed by value with `_row_hashes`, and numeric key columns are cast to float first,
+    so that values that pandas compares as equal, like 1 and 1.0, end up in the same partition as well."""
+    key_cols = [df.iloc[:,i].infer_objects() for i in keys]
+    key_cols = [col.astype(np.float64) if pd.api.types.is_numeric_dtype(col) else col for col in key_cols]
+    hashes = _row_hashes(pd.concat(key_cols,axis=1,ignore_index=True))
+    partition_ids = hashes % np.uint64(n_partitions)
+    return [df[partition_ids==i] for i in range(n_partitions)]
+
+def _run_task(task):
+    func,dfs,kwargs = task
+    return func(*dfs,**kwargs)
+
+def _concat(results):
+    non_empty = [res for res in results if not res.empty]
+    if len(non_empty)==0:
+        return results[0]
+    return pd.concat(non_empty,ignore_index=True)
+
+def _is_picklable(obj):
+    try:
+        pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+# %% ../nbs/014_partitioned_backend.ipynb 8
+# operators that distribute over unions, so that their result on the union of two relations is the union of their results on each
+_LINEAR_OPS = {'rename','project','select','join','multiway_join','product','semijoin'}
+
+def _linear_recursion(G,component):
+    """returns the union of a recursive component and the children of the union in the component, if the recursion is linear:
+    the component has a single union and each of its recursive rules reads the union once, through operators in `_LINEAR_OPS`.
+    The rows a linear recursion derives in an iteration can be computed from the rows that were new in the previous iteration alone.
+    Returns None for other components."""
+    unions = [u for u in component if G.nodes[u]['op']=='union']
+    if len(unions)!=1 or len(G.nodes[unions[0]]['schema'])==0:
+        return None
+    union = unions[0]
+    others = component-{union}
+    # rules with IE functions join the outputs of the IE function with the relation it read, so they read the union twice
+    if any(G.nodes[u]['op'] not in _LINEAR_OPS for u in others):
+        return None
+    H = nx.subgraph(G,others)
+    if not nx.is_directed_acyclic_graph(H):
+        return None
+    # the number of paths from each node to the union, which is the number of times its result reads the union
+    paths = {union:1}
+    for u in reversed(list(nx.topological_sort(H))):
+        paths[u] = sum(paths[v] for v in G.successors(u) if v in component)
+    branches = [v for v in G.successors(union) if v in component]
+    if any(paths[v]!=1 for v in branches):
+        return None
+    return union,branches
+
+def _delta_graph(G,component,union,branches,load):
+    """returns a copy of the component that computes the rows its recursive rules derive from the rows of the union in db['delta'],
+    along with its root and db. The children of the component are read from db, where load puts their results."""
+    inputs = {v for u in component-{union} for v in G.successors(u) if v not in component}
+    H = nx.DiGraph(nx.subgraph(G,(component-{union})|inputs))
+    db = DB()
+    for i,v in enumerate(inputs):
+        H.remove_edges_from(list(H.out_edges(v)))
+        H.nodes[v].clear()
+        H.nodes[v].update(op='get_rel',rel=f'input{i}',db=db,schema=G.nodes[v]['schema'])
+        db[f'input{i}'] = load(v)
+    schema = G.nodes[union]['schema']
+    H.add_node(union,op='get_rel',rel='delta',db=db,schema=schema)
+    H.add_edges_from((u,union) for u in component if u!=union and G.has_edge(u,union))
+    root = ('derived',union)
+    H.add_node(root,op='union',schema=schema)
+    H.add_edges_from((root,v) for v in branches)
+    return H,root,db
+
+def _send_reply(conn,ok,payload):
+    try:
+        conn.send((ok,payload))
+    except Exception as e:
+        conn.send((False,RuntimeError(f"can not send the result of a fixpoint worker: {e}, the result was {payload!r}")))
+
+def _receive_reply(conn):
+    ok,payload = conn.recv()
+    if not ok:
+        raise payload
+    return payload
+
+def _fixpoint_worker(conn,H,root,db,schema,n_partitions):
+    """runs in a forked worker process, which owns the rows of the recursive relation in its hash partition.
+    Each step receives the rows derived for its partition, keeps the ones it did not own yet,
+    and replies with their number and with the rows the recursive rules derive from them, partitioned by their owners.
+    Once it receives None, it replies with the rows it owns."""
+    owned = RowSet(pd.DataFrame(columns=schema))
+    all_cols = list(range(len(schema)))
+    while True:
+        try:
+            parts = conn.recv()
+        except EOFError:
+            # the main process stopped the fixpoint
+            return
+        try:
+            if parts is None:
+                _send_reply(conn,True,rename(owned.df,schema))
+                return
+            new_rows = owned.new_rows(rename(_concat(parts),schema))
+            if new_rows.empty:
+                _send_reply(conn,True,(0,None))
+                continue
+            db['delta'] = new_rows
+            derived = compute_node(H,root)
+            _send_reply(conn,True,(len(new_rows),_partition(rename(derived,schema),all_cols,n_partitions)))
+        except Exception as e:
+            _send_reply(conn,False,e)
+            return
+
+# %% ../nbs/014_partitioned_backend.ipynb 9
+class PartitionedBackend(Backend):
+    """A backend that hash partitions the inputs of joins, unions, set operations and aggregations
+    and computes the partitions in parallel on a pool of worker processes.
+    Linear recursive components are computed by forked workers that each own a partition of the recursive relation,
+    and exchange only the rows derived in each iteration.
+    """
+    def __init__(self,
+        n_workers:Optional[int]=None, # number of worker processes, defaults to the number of cpus
+        min_rows:int=100_000, # inputs with fewer rows are computed in the main process, since sending them to workers is not worth it
+        worker_fixpoint:bool=True, # whether to compute linear recursive components in the workers, otherwise only their operators are partitioned
+        ):
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count()
+        self.min_rows = min_rows
+        self.worker_fixpoint = worker_fixpoint
+        self._pool = None
+        super().__init__(name='partitioned',
+            join=self.join,
+            union=self.union,
+            intersection=self.intersection,
+            difference=self.difference,
+            groupby=self.groupby,
+        )
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+        return self._pool
+
+    def close(self):
+        """shuts down the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _map_partitions(self,func,dfs,keys,**kwargs):
+        """partitions each df in dfs by its key columns and runs func on the matching partitions of all dfs"""
+        partitioned = [_partition(df,df_keys,self.n_workers) for df,df_keys in zip(dfs,keys)]
+        tasks = [(func,[parts[i] for parts in partitioned],kwargs) for i in range(self.n_workers)]
+        return _concat(list(self.pool.map(_run_task,tasks)))
+
+    def _is_small(self,*dfs):
+        return sum(len(df) for df in dfs)<self.min_rows
+
+    def join(self,df1,df2,schema,**kwargs):
+        if (df1 is None or df2 is None or is_falsy(df1) or is_falsy(df2) or is_truthy(df1) or is_truthy(df2) or
+            self._is_small(df1,df2)):
+            return join(df1,df2,schema)
+        on = [col for col in df1.columns if col in set(df2.columns)]
+        if len(on)==0:
+            # a cross product, split one side and send the other one to all workers
+            parts = np.array_split(np.arange(len(df1)),self.n_workers)
+            tasks = [(product,[df1.iloc[part],df2],{'schema':schema}) for part in parts]
+            return _concat(list(self.pool.map(_run_task,tasks)))
+        keys1 = [list(df1.columns).index(col) for col in on]
+        keys2 = [list(df2.columns).index(col) for col in on]
+        return self._map_partitions(join,[df1,df2],[keys1,keys2],schema=schema)
+
+    def union(self,*dfs,schema,**kwargs):
+        non_empty_dfs = [df for df in dfs if df is not None and not df.empty]
+        if len(non_empty_dfs)==0 or len(schema)==0 or self._is_small(*non_empty_dfs):
+            return union(*dfs,schema=schema)
+        # rows are deduplicated within each partition, since equal rows are hashed to the same partition
+        all_cols = list(range(len(schema)))
+        return self._map_partitions(union,[rename(df,schema) for df in non_empty_dfs],[all_cols]*len(non_empty_dfs),schema=schema)
+
+    def _set_op(self,op,df1,df2,schema):
+        if df1 is None or df2 is None or df1.empty or df2.empty or self._is_small(df1,df2):
+            return op(df1,df2,schema)
+        all_cols = list(range(len(df1.columns)))
+        return self._map_partitions(op,[df1,df2],[all_cols,all_cols],schema=schema)
+
+    def intersection(self,df1,df2,schema,**kwargs):
+        return self._set_op(intersection,df1,df2,schema)
+
+    def difference(self,df1,df2,schema,**kwargs):
+        return self._set_op(difference,df1,df2,schema)
+
+    def groupby(self,df,schema,agg,**kwargs):
+        group_cols = [i for i,agg_func in enumerate(agg) if agg_func is None]
+        if (df is None or df.empty or self._is_small(df) or
+            not all(_is_picklable(agg_func) for agg_func in agg)):
+            return groupby(df,schema,agg)
+        if _is_mergeable(agg):
+            # mergeable aggregations are computed on chunks of rows and the states of the chunks are merged,
+            # which also parallelizes aggregations without group by columns
+            chunks = [chunk for chunk in np.array_split(np.arange(len(df)),self.n_workers) if len(chunk)>0]
+            tasks = [(agg_states,[df.iloc[chunk]],{'schema':schema,'agg':agg}) for chunk in chunks]
+            states = merge_agg_states(*self.pool.map(_run_task,tasks),schema=schema,agg=agg)
+            return finalize_agg_states(states,schema,agg)
+        if len(group_cols)==0:
+            return groupby(df,schema,agg)
+        return self._map_partitions(groupby,[df],[group_cols],schema=schema,agg=agg)
+
+    def compute_recursive_component(self,G,component,results,memory=None,cancel=None):
+        linear = None
+        # the workers get the component and its inputs by forking, rather than by pickling them
+        if self.worker_fixpoint and 'fork' in multiprocessing.get_all_start_methods():
+            linear = _linear_recursion(G,component)
+        if linear is None:
+            return super().compute_recursive_component(G,component,results,memory=memory,cancel=cancel)
+        union,branches = linear
+        load = (lambda v: results[v][-1]) if memory is None else (lambda v: memory.load(results,v))
+        schema = G.nodes[union]['schema']
+        H,root,db = _delta_graph(G,component,union,branches,load)
+        base = [rename(load(v),schema) for v in G.successors(union) if v not in component]
+        base = _concat(base) if len(base)>0 else pd.DataFrame(columns=schema)
+        if self._is_small(base,*(df for df in db.values() if df is not None)):
+            return super().compute_recursive_component(G,component,results,memory=memory,cancel=cancel)
+        logger.debug(f"computing the linear recursion of {union} on {self.n_workers} workers")
+        rows = self._worker_fixpoint(H,root,db,schema,base,cancel)
+        # the other nodes of the component are computed once more from the final rows of the union
+        order = [union]+list(reversed(list(nx.topological_sort(nx.subgraph(G,component-{union})))))
+        for u in order:
+            if u==union:
+                if memory is None:
+                    results[u].append(rows)
+                else:
+                    results[u] = [rows]
+                    memory.track(results,u)
+            else:
+                _collect_children_and_run(G,u,results,[],backend=self,memory=memory)
+        for u in component:
+            G.nodes[u]['final'] = True
+
+    def _worker_fixpoint(self,H,root,db,schema,base,cancel):
+        """computes the rows of a linear recursion with base rows, semi naively on forked workers"""
+        context = multiprocessing.get_context('fork')
+        all_cols = list(range(len(schema)))
+        conns,workers = [],[]
+        try:
+            for _ in range(self.n_workers):
+                conn,worker_conn = context.Pipe()
+                worker = context.Process(target=_fixpoint_worker,args=(worker_conn,H,root,db,schema,self.n_workers),daemon=True)
+                worker.start()
+                worker_conn.close()
+                conns.append(conn)
+                workers.append(worker)
+            incoming = [[part] for part in _partition(base,all_cols,self.n_workers)]
+            while True:
+                _check_cancelled(cancel)
+                for conn,parts in zip(conns,incoming):
+                    conn.send(parts)
+                replies = [_receive_reply(conn) for conn in conns]
+                if sum(n_new for n_new,_ in replies)==0:
+                    break
+                incoming = [[parts[i] for _,parts in replies if parts is not None] for i in range(self.n_workers)]
+            for conn in conns:
+                conn.send(None)
+            return _concat([_receive_reply(conn) for conn in conns])
+        finally:
+            # closing the connections stops workers that are still waiting for rows
+            for conn in conns:
+                conn.close()
+            for worker in workers:
+                worker.join(timeout=1)
+                if worker.is_alive():
+                    worker.terminate()
@@ -0,0 +1,154 @@
+"""Multithreaded relational operators implemented with polars"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/012_polars_backend.ipynb.
+
+# %% auto 0
+__all__ = ['logger', 'pl_join', 'pl_product', 'pl_union', 'pl_intersection', 'pl_difference', 'pl_groupby', 'PolarsBackend']
+
+# %% ../nbs/012_polars_backend.ipynb 3
+import pandas as pd
+import polars as pl
+from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union
+import logging
+logger = logging.getLogger(__name__)
+
+from spannerlib.ra import (
+    is_truthy,
+    is_falsy,
+    rename,
+    union,
+    intersection,
+    difference,
+    join,
+    product,
+    groupby,
+)
+from .engine import Backend
+
+# %% ../nbs/012_polars_backend.ipynb 6
+def _is_string_column(col):
+    """whether col holds only strings, either in a pandas string dtype or in an object column, which are converted to polars strings"""
+    if isinstance(col.dtype,pd.StringDtype):
+        return True
+    return col.dtype==object and pd.api.types.infer_dtype(col,skipna=True)=='string'
+
+def _string_columns(df):
+    return tuple(_is_string_column(df.iloc[:,i]) for i in range(df.shape[1]))
+
+def _is_polars_compatible(df,min_rows):
+    """whether df can be converted to polars and is large enough for it to pay off.
+    Object columns are supported only if they hold strings, polars can not hash Spans and other python objects."""
+    return (
+        len(df)>=min_rows and
+        len(set(df.columns))==len(df.columns) and
+        all(df.dtypes.iloc[i]!=object or _is_string_column(df.iloc[:,i]) for i in range(df.shape[1]))
+    )
+
+def _same_string_columns(*dfs):
+    """whether the dfs hold strings in the same positions, polars would cast numbers compared with strings to strings"""
+    return len({_string_columns(df) for df in dfs})==1
+
+def _to_polars(df):
+    return pl.from_pandas(df.set_axis([str(col) for col in df.columns],axis=1))
+
+def _to_pandas(df,schema):
+    return df.to_pandas().set_axis(schema,axis=1)
+
+# %% ../nbs/012_polars_backend.ipynb 7
+def pl_join(df1,df2,schema,min_rows=0,**kwargs):
+    if (df1 is None or df2 is None or is_falsy(df1) or is_falsy(df2) or is_truthy(df1) or is_truthy(df2) or
+        not _is_polars_compatible(df1,min_rows) or not _is_polars_compatible(df2,min_rows)):
+        return join(df1,df2,schema)
+    on = [col for col in df1.columns if col in set(df2.columns)]
+    if not _same_string_columns(df1[on],df2[on]):
+        return join(df1,df2,schema)
+    left,right = _to_polars(df1),_to_polars(df2)
+    if len(on)==0:
+        res = left.join(right,how='cross')
+    else:
+        res = left.join(right,how='inner',on=[str(col) for col in on],nulls_equal=True)
+    return _to_pandas(res,list(df1.columns)+[col for col in df2.columns if col not in on])
+
+def pl_product(df1,df2,schema,min_rows=0,**kwargs):
+    if (df1 is None or df2 is None or df1.empty or df2.empty or
+        not _is_polars_compatible(df1,min_rows) or not _is_polars_compatible(df2,min_rows)):
+        return product(df1,df2,schema)
+    res = _to_polars(df1).join(_to_polars(df2),how='cross')
+    return _to_pandas(res,list(df1.columns)+list(df2.columns))
+
+def pl_union(*dfs,schema,min_rows=0,**kwargs):
+    non_empty_dfs = [df for df in dfs if df is not None and not df.empty]
+    if (len(non_empty_dfs)==0 or
+        not all(_is_polars_compatible(df,0) for df in non_empty_dfs) or
+        not _same_string_columns(*non_empty_dfs) or
+        sum(len(df) for df in non_empty_dfs)<min_rows):
+        return union(*dfs,schema=schema)
+    frames = [_to_polars(rename(df,[f'col_{i}' for i in range(len(schema))])) for df in non_empty_dfs]
+    res = pl.concat(frames,how='vertical_relaxed').unique()
+    return _to_pandas(res,schema)
+
+def pl_intersection(df1,df2,schema,min_rows=0,**kwargs):
+    if (df1 is None or df2 is None or df1.empty or df2.empty or
+        not _is_polars_compatible(df1,min_rows) or not _is_polars_compatible(df2,0) or
+        not _same_string_columns(df1,df2)):
+        return intersection(df1,df2,schema)
+    on = [str(col) for col in df1.columns]
+    res = _to_polars(df1).join(_to_polars(df2),how='semi',on=on,nulls_equal=True)
+    return _to_pandas(res,list(df1.columns))
+
+def pl_difference(df1,df2,schema,min_rows=0,**kwargs):
+    if (df1 is None or df2 is None or df1.empty or df2.empty or
+        not _is_polars_compatible(df1,min_rows) or not _is_polars_compatible(df2,0) or
+        not _same_string_columns(df1,df2)):
+        return difference(df1,df2,schema)
+    on = [str(col) for col in df1.columns]
+    res = _to_polars(df1).unique().join(_to_polars(df2),how='anti',on=on,nulls_equal=True)
+    return _to_pandas(res,list(df1.columns))
+
+# %% ../nbs/012_polars_backend.ipynb 8
+_POLARS_AGGS = {
+    'sum':lambda col: col.sum(),
+    'min':lambda col: col.min(),
+    'max':lambda col: col.max(),
+    'count':lambda col: col.count(),
+    'mean':lambda col: col.mean(),
+}
+
+def pl_groupby(df,schema,agg,min_rows=0,**kwargs):
+    if (df is None or df.empty or
+        not all(agg_func is None or (isinstance(agg_func,str) and agg_func in _POLARS_AGGS) for agg_func in agg) or
+        not _is_polars_compatible(rename(df,list(range(len(schema)))),min_rows)):
+        return groupby(df,schema,agg)
+    # use positional names so that we can aggregate the same free var to multiple places
+    pos_names = [f'col_{i}' for i in range(len(schema))]
+    pl_df = _to_polars(rename(df,pos_names))
+    groupby_cols = [pos_names[i] for i,agg_func in enumerate(agg) if agg_func is None]
+    agg_exprs = [_POLARS_AGGS[agg_func](pl.col(pos_names[i])).alias(pos_names[i])
+        for i,agg_func in enumerate(agg) if agg_func is not None]
+    if len(groupby_cols)>0:
+        res = pl_df.group_by(groupby_cols).agg(agg_exprs)
+    else:
+        res = pl_df.select(agg_exprs)
+    return _to_pandas(res.select(pos_names),schema)
+
+# %% ../nbs/012_polars_backend.ipynb 9
+class PolarsBackend(Backend):
+    """A backend that runs joins, unions, set operations and builtin aggregations with polars"""
+    def __init__(self,
+        min_rows:int=10_000, # inputs with fewer rows are computed with pandas, since converting them is not worth it
+        ):
+        self.min_rows = min_rows
+        ops = {
+            'join':pl_join,
+            'product':pl_product,
+            'union':pl_union,
+            'intersection':pl_intersection,
+            'difference':pl_difference,
+            'groupby':pl_groupby,
+        }
+        super().__init__(name='polars',**{op:self._with_min_rows(func) for op,func in ops.items()})
+
+    def _with_min_rows(self,func):
+        def op_func(*args,**kwargs):
+            return func(*args,**kwargs,min_rows=self.min_rows)
+        return op_func
@@ -3,9 +3,12 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/008_extended_RA_operations.ipynb.
 
 # %% auto 0
-__all__ = ['logger', 'equalConstTheta', 'equalColTheta', 'get_const', 'is_truthy', 'is_falsy', 'select', 'project', 'rename',
-           'intersection', 'difference', 'product', 'join', 'merge_rows', 'union', 'groupby', 'coerce_tuple_like',
-           'assert_ie_schema', 'assert_iterable', 'map_iter', 'ie_map']
+__all__ = ['logger', 'AGG_BATCH_SIZE', 'IE_VALIDATION', 'IE_VALIDATION_ROWS', 'IE_VALIDATION_STRIDE', 'ASYNC_IE_CONCURRENCY',
+           'IE_BATCH_SIZE', 'IE_CHUNK_SIZE', 'drop_duplicate_rows', 'relation_fingerprint', 'equalConstTheta',
+           'equalColTheta', 'get_const', 'is_truthy', 'is_falsy', 'select', 'project', 'rename', 'intersection',
+           'difference', 'product', 'join', 'multiway_join', 'semijoin', 'merge_rows', 'RowSet', 'union', 'agg_states',
+           'merge_agg_states', 'finalize_agg_states', 'groupby', 'monotone_union', 'coerce_tuple_like',
+           'assert_ie_schema', 'compile_schema_check', 'assert_iterable', 'IECache', 'ie_map']
 
 # %% ../nbs/008_extended_RA_operations.ipynb 3
 import pytest
@@ -15,10 +18,18 @@ import numpy as np
 from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union
 import networkx as nx
 import itertools
+import functools
+import inspect
+import sys
+import threading
+from collections import OrderedDict,defaultdict
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 from .utils import assert_df_equals,is_of_schema,schema_match
 from .span import Span
-from .data_types import _infer_relation_schema,pretty
+from .data_types import _infer_relation_schema,pretty,MergeableAGG
+from .metrics import FunctionStats
 
 import logging
 logger = logging.getLogger(__name__)
@@ -31,6 +42,96 @@ def _col_names(length):
 
 
 # %% ../nbs/008_extended_RA_operations.ipynb 8
+def _row_codes(df):
+    """returns a frame of fixed width codes with a row for each row in df, such that rows of df are equal iff their codes are equal.
+    Span columns are split into document, start and end codes, so that spans are compared without calling python equality on every pair.
+    """
+    codes = {}
+    for i in range(df.shape[1]):
+        col = df.iloc[:,i]
+        if col.dtype != object:
+            codes[i] = col.to_numpy()
+            continue
+        try:
+            docs = [span.doc for span in col]
+            starts = [span.start for span in col]
+            ends = [span.end for span in col]
+        except AttributeError:
+            # not a span column, compare the values themselves
+            codes[i] = pd.factorize(col.to_numpy())[0]
+            continue
+        # documents are long strings, so we hash each distinct document object once
+        docs = np.array(docs,dtype=object)
+        doc_object_codes = pd.factorize(np.fromiter(map(id,docs),dtype=np.int64,count=len(docs)))[0]
+        _,first_positions = np.unique(doc_object_codes,return_index=True)
+        codes[(i,'doc')] = pd.factorize(docs[first_positions])[0][doc_object_codes]
+        codes[(i,'start')] = np.array(starts,dtype=np.int64)
+        codes[(i,'end')] = np.array(ends,dtype=np.int64)
+    return pd.DataFrame(codes,index=df.index)
+
+def drop_duplicate_rows(df):
+    """drops duplicate rows from df, supporting columns of Spans and other hashable python objects"""
+    if df.shape[1]==0:
+        return df.iloc[:min(len(df),1)]
+    return df[~_row_codes(df).duplicated().to_numpy()].reset_index(drop=True)
+
+def _number_hashes(values):
+    """hashes numbers by their float64 value, so that ints and floats that pandas compares as equal are hashed equally.
+    Adding 0.0 turns -0.0 into 0.0, which are equal as well, and every NaN is hashed like a single NaN,
+    since NaNs can have different bits and python hashes NaN objects by their id."""
+    values = np.asarray(values,dtype=np.float64)+0.0
+    values[np.isnan(values)] = np.nan
+    return pd.util.hash_array(values)
+
+def _column_hashes(col):
+    """hashes each value in col, such that values that pandas compares as equal are hashed equally regardless of the dtype of the column.
+    Numbers are hashed by their float value, in numeric columns as well as in columns of mixed python values."""
+    if pd.api.types.is_numeric_dtype(col.dtype):
+        return _number_hashes(col.to_numpy(dtype=np.float64,na_value=np.nan))
+    if col.dtype != object:
+        return pd.util.hash_array(col.to_numpy(dtype=object) if isinstance(col.dtype,pd.StringDtype) else col.to_numpy())
+    values = col.to_numpy()
+    try:
+        # python caches the hash of strings, so each document is only hashed once
+        doc_hashes = np.fromiter((hash(span.doc) for span in values),dtype=np.int64,count=len(values))
+        starts = np.fromiter((span.start for span in values),dtype=np.int64,count=len(values))
+        ends = np.fromiter((span.end for span in values),dtype=np.int64,count=len(values))
+        return _combine_hashes([pd.util.hash_array(doc_hashes),pd.util.hash_array(starts),pd.util.hash_array(ends)],len(values))
+    except AttributeError:
+        pass
+    if all(isinstance(val,str) for val in values):
+        return pd.util.hash_array(values)
+    # numbers and strings in columns of mixed values are hashed like in numeric and string columns, other values by their python hash.
+    # missing values, like None, are hashed like NaN, as pandas matches them when it drops duplicates
+    is_na = pd.isna(values)
+    is_number = is_na | np.fromiter((isinstance(val,(int,float,np.number)) for val in values),dtype=bool,count=len(values))
+    is_str = np.fromiter((isinstance(val,str) for val in values),dtype=bool,count=len(values))
+    hashes = np.fromiter((0 if number or string else hash(val) for val,number,string in zip(values,is_number,is_str)),
+        dtype=np.int64,count=len(values)).view(np.uint64)
+    hashes[is_number] = _number_hashes(np.where(is_na[is_number],np.nan,values[is_number]))
+    hashes[is_str] = pd.util.hash_array(values[is_str])
+    return hashes
+
+def _combine_hashes(hashes,length):
+    combined = np.zeros(length,dtype=np.uint64)
+    for col_hashes in hashes:
+        combined = combined*np.uint64(1000003) ^ col_hashes
+    return combined
+
+def _row_hashes(df):
+    """hashes each row of df, rows that pandas compares as equal are hashed equally, regardless of the dtypes of the columns"""
+    df = df.infer_objects()
+    return _combine_hashes([_column_hashes(df.iloc[:,i]) for i in range(df.shape[1])],len(df))
+
+def relation_fingerprint(df):
+    """returns a fingerprint of the rows of df that does not depend on the order of the rows or on the dtypes of the columns,
+    numbers are fingerprinted by their value whether they are ints or floats, and all NaNs are fingerprinted alike.
+    Used to detect that a relation did not change between iterations of a fixpoint."""
+    if df is None:
+        return None
+    return (df.shape,int(_row_hashes(df).sum(dtype=np.uint64)))
+
+# %% ../nbs/008_extended_RA_operations.ipynb 11
 # some select theta functions
 
 class equalConstTheta():
@@ -64,7 +165,7 @@ class equalColTheta():
             return False
         return self.col_pos_tuples == other.col_pos_tuples
 
-# %% ../nbs/008_extended_RA_operations.ipynb 12
+# %% ../nbs/008_extended_RA_operations.ipynb 15
 def get_const(const_dict,**kwargs):
     return pd.DataFrame([const_dict])
 
@@ -75,7 +176,7 @@ def is_truthy(df):
 def is_falsy(df):
     return df.shape==(0,0)
 
-# %% ../nbs/008_extended_RA_operations.ipynb 14
+# %% ../nbs/008_extended_RA_operations.ipynb 17
 def select(df,theta,schema,**kwargs):
     if df is None or df.empty:
         return pd.DataFrame(columns=schema)
@@ -102,10 +203,39 @@ def intersection(df1,df2,schema,**kwargs):
         return pd.DataFrame(columns=schema)
     return pd.merge(df1,df2,how='inner',on=list(df1.columns))
 
+def _rows_equal(rows1,rows2):
+    """compares rows1 and rows2 row by row, by position, where missing values are equal to each other"""
+    equal = np.ones(len(rows1),dtype=bool)
+    for i in range(rows1.shape[1]):
+        col1,col2 = rows1.iloc[:,i].to_numpy(),rows2.iloc[:,i].to_numpy()
+        if col1.dtype != col2.dtype:
+            col1,col2 = col1.astype(object),col2.astype(object)
+        equal &= np.asarray(col1==col2,dtype=bool) | (pd.isna(col1) & pd.isna(col2))
+    return equal
+
 def difference(df1,df2,schema,**kwargs):
-    if df1 is None or df2 is None or df1.empty or df2.empty:
+    """the distinct rows of df1 that are not in df2, comparing rows by position.
+    Implemented as a hash anti join, probing the row hashes of df1 in the row hashes of df2."""
+    if df1 is None or df1.empty:
         return pd.DataFrame(columns=schema)
-    return pd.concat([df1,df2]).drop_duplicates(keep=False)
+    if df2 is None or df2.empty:
+        return drop_duplicate_rows(df1)
+    # build a hash table with a single row of df2 for each hash and probe it with the rows of df1
+    hashes2 = _row_hashes(df2)
+    first = ~pd.Index(hashes2).duplicated()
+    build_rows,build_hashes = df2[first],pd.Index(hashes2[first])
+    matches = build_hashes.get_indexer(_row_hashes(df1))
+    candidates = np.flatnonzero(matches!=-1)
+    # rows with equal hashes are compared by value to rule out hash collisions
+    candidate_rows = df1.iloc[candidates]
+    equal = _rows_equal(candidate_rows,build_rows.iloc[matches[candidates]])
+    if not equal.all():
+        df2_rows = set(df2.itertuples(index=False,name=None))
+        for j in np.flatnonzero(~equal):
+            equal[j] = tuple(candidate_rows.iloc[j]) in df2_rows
+    keep = np.ones(len(df1),dtype=bool)
+    keep[candidates[equal]] = False
+    return drop_duplicate_rows(df1[keep])
 
 
 def product(df1,df2,schema,**kwargs):
@@ -114,7 +244,7 @@ def product(df1,df2,schema,**kwargs):
     return pd.merge(df1,df2,how='cross')
 
 
-# %% ../nbs/008_extended_RA_operations.ipynb 34
+# %% ../nbs/008_extended_RA_operations.ipynb 37
 def join(df1,df2,schema,**kwargs):
     if df1 is None or df2 is None or is_falsy(df1) or is_falsy(df2):
         return pd.DataFrame(columns=schema)
@@ -137,11 +267,151 @@ def join(df1,df2,schema,**kwargs):
     else:
         return pd.merge(df1,df2,how='inner',on=on)
 
-# %% ../nbs/008_extended_RA_operations.ipynb 46
+# %% ../nbs/008_extended_RA_operations.ipynb 49
+def _extension_counts(bindings,proj,keys):
+    """the number of values proj has for each binding, given the values of the key columns"""
+    if len(keys)==0:
+        return np.full(len(bindings),len(proj))
+    counts = proj.groupby(keys).size().rename('_count').reset_index()
+    return bindings[keys].merge(counts,on=keys,how='left')['_count'].fillna(0).to_numpy()
+
+def multiway_join(*dfs,schema,**kwargs):
+    """Joins all dfs at once on their shared columns using generic join, a worst case optimal join algorithm.
+    Variables are bound one at a time, and each partial binding is extended by the relation with the fewest matching values for it,
+    and filtered by the other relations, so cyclic joins such as triangles do not create intermediate results larger than the output.
+    The result has set semantics.
+    """
+    if any(df is None or is_falsy(df) for df in dfs):
+        return pd.DataFrame(columns=schema)
+    rels = [drop_duplicate_rows(df) for df in dfs if not is_truthy(df)]
+    if len(rels)==0:
+        return pd.DataFrame([()])
+    if any(rel.empty for rel in rels):
+        return pd.DataFrame(columns=schema)
+
+    # bind variables that appear in many relations first
+    variables = list(dict.fromkeys(col for rel in rels for col in rel.columns))
+    variables.sort(key=lambda var: -sum(var in rel.columns for rel in rels))
+
+    bindings = pd.DataFrame(index=[0])
+    bound = []
+    for var in variables:
+        var_rels = [rel for rel in rels if var in rel.columns]
+        keys = [[col for col in rel.columns if col in bound] for rel in var_rels]
+        projs = [drop_duplicate_rows(rel[rel_keys+[var]]) for rel,rel_keys in zip(var_rels,keys)]
+        counts = np.vstack([_extension_counts(bindings,proj,rel_keys) for proj,rel_keys in zip(projs,keys)])
+        choice = counts.argmin(axis=0)
+        has_extensions = counts.min(axis=0)>0
+
+        extended = []
+        for i,(proj,rel_keys) in enumerate(zip(projs,keys)):
+            part = bindings.loc[(choice==i) & has_extensions]
+            # bindings has no columns before the first variable is bound, so check the row count rather than empty
+            if len(part)==0:
+                continue
+            part = part.merge(proj,on=rel_keys) if len(rel_keys)>0 else part.merge(proj,how='cross')
+            # the projections are distinct, so merging with them only filters the extended bindings
+            for j,(other_proj,other_keys) in enumerate(zip(projs,keys)):
+                if j!=i:
+                    part = part.merge(other_proj,on=other_keys+[var])
+            extended.append(part)
+        bound.append(var)
+        if len(extended)==0:
+            return pd.DataFrame(columns=schema)
+        bindings = pd.concat(extended,ignore_index=True)[bound]
+
+    return bindings[list(schema)+[var for var in bound if var not in schema]]
+
+# %% ../nbs/008_extended_RA_operations.ipynb 52
+def _bloom_filter_contains(build_hashes,probe_hashes,bits_per_value=8,n_hashes=3):
+    """checks which of probe_hashes might be in build_hashes using a bloom filter over build_hashes.
+    Every hash in build_hashes is found, other hashes are found with a small false positive rate."""
+    n_bits = max(64,len(build_hashes)*bits_per_value)
+    bits = np.zeros(n_bits,dtype=bool)
+    # derive the bloom filter's hash functions from two halves of the 64 bit row hashes
+    def positions(hashes,i):
+        return ((hashes & np.uint64(0xffffffff)) + np.uint64(i)*(hashes >> np.uint64(32))) % np.uint64(n_bits)
+    contains = np.ones(len(probe_hashes),dtype=bool)
+    for i in range(n_hashes):
+        bits[positions(build_hashes,i)] = True
+    for i in range(n_hashes):
+        contains &= bits[positions(probe_hashes,i)]
+    return contains
+
+def semijoin(df1,df2,schema,bloom_min_rows=None,**kwargs):
+    """keeps the rows of df1 that join with some row of df2, used to shrink relations before joining them.
+    Rows are matched by the hashes of their shared columns, which hash numbers by value like joins compare them,
+    so rows whose hashes collide might be kept, but the joins that read the result remove them.
+    If bloom_min_rows is given and df2 has at least that many rows, df2 is summarized by a bloom filter instead of a set of hashes.
+    """
+    if df1 is None or is_falsy(df1) or is_truthy(df2):
+        return df1
+    if df2 is None or is_falsy(df2) or df2.empty:
+        return df1.iloc[0:0]
+    keys = [col for col in df1.columns if col in df2.columns]
+    if len(keys)==0 or df1.empty:
+        return df1
+    build_hashes = np.unique(_row_hashes(df2[keys]))
+    probe_hashes = _row_hashes(df1[keys])
+    if bloom_min_rows is not None and len(df2)>=bloom_min_rows:
+        matches = _bloom_filter_contains(build_hashes,probe_hashes)
+    else:
+        matches = np.isin(probe_hashes,build_hashes)
+    return df1[matches]
+
+# %% ../nbs/008_extended_RA_operations.ipynb 55
 def merge_rows(*dfs):
-    return pd.DataFrame(
-        set.union(*[set(df.itertuples(index=False,name=None)) for df in dfs])
-    )
+    """concatenates dfs positionally and drops duplicate rows"""
+    return drop_duplicate_rows(pd.concat(
+        [df.set_axis(range(df.shape[1]),axis=1) for df in dfs],
+        ignore_index=True))
+
+class RowSet():
+    """The set of rows of a relation, used to add rows to a relation while checking only the new rows for duplicates.
+    `df` holds the rows of the set, which are indexed by their `_row_hashes`, kept sorted in a numpy array
+    along with the position of their row in `df`.
+    New rows whose hash is in the set are compared by value with the stored rows to rule out hash collisions."""
+    def __init__(self,df):
+        self.df = df
+        hashes = _row_hashes(df)
+        self.positions = np.argsort(hashes,kind='stable')
+        self.hashes = hashes[self.positions]
+
+    def _contains(self,df,hashes):
+        """returns whether each row of df, with the given row hashes, is in the set"""
+        found = np.zeros(len(df),dtype=bool)
+        if len(self.hashes)==0:
+            return found
+        starts = np.searchsorted(self.hashes,hashes,side='left')
+        ends = np.searchsorted(self.hashes,hashes,side='right')
+        candidates = np.flatnonzero(starts<ends)
+        # compare each candidate with the first stored row with its hash
+        found[candidates] = _rows_equal(df.iloc[candidates],self.df.iloc[self.positions[starts[candidates]]])
+        # on a hash collision, compare the candidate with the other stored rows with its hash
+        for j in candidates[~found[candidates]]:
+            stored = self.df.iloc[self.positions[starts[j]+1:ends[j]]]
+            found[j] = _rows_equal(df.iloc[[j]*len(stored)],stored).any()
+        return found
+
+    def new_rows(self,df):
+        """returns the rows of df that are not in the set, without duplicates, and adds them to the set"""
+        df = drop_duplicate_rows(df)
+        hashes = _row_hashes(df)
+        is_new = ~self._contains(df,hashes)
+        new_df = df[is_new].reset_index(drop=True)
+        if new_df.empty:
+            return new_df
+        # insert the sorted hashes of the new rows, which are appended to the end of df
+        new_positions = len(self.df)+np.argsort(hashes[is_new],kind='stable')
+        new_hashes = hashes[is_new][new_positions-len(self.df)]
+        inserts = np.searchsorted(self.hashes,new_hashes,side='right')
+        self.hashes = np.insert(self.hashes,inserts,new_hashes)
+        self.positions = np.insert(self.positions,inserts,new_positions)
+        if self.df.empty:
+            self.df = new_df.set_axis(range(new_df.shape[1]),axis=1)
+        else:
+            self.df = pd.concat([self.df,new_df.set_axis(self.df.columns,axis=1)],ignore_index=True)
+        return new_df
 
 
 def union(*dfs,schema,**kwargs):
@@ -154,14 +424,73 @@ def union(*dfs,schema,**kwargs):
         return pd.DataFrame(columns=schema)
     else:
         return rename(merge_rows(*non_empty_dfs),schema)
-        # This line didnt work since drop duplicates doesnt work correctly on non primitive classes such as Spans
-        # return pd.DataFrame(np.concatenate(non_empty_dfs,axis=0),columns=schema).drop_duplicates(ignore_index=True)
 
-# %% ../nbs/008_extended_RA_operations.ipynb 50
+# %% ../nbs/008_extended_RA_operations.ipynb 61
+AGG_BATCH_SIZE = 100_000
+
+def _is_mergeable(agg):
+    agg_funcs = [agg_func for agg_func in agg if agg_func is not None]
+    return len(agg_funcs)>0 and all(isinstance(agg_func,MergeableAGG) for agg_func in agg_funcs)
+
+def _object_series(values,index):
+    # states can be lists or tuples, which pandas and numpy would otherwise unpack into columns
+    arr = np.empty(len(values),dtype=object)
+    for i,value in enumerate(values):
+        arr[i] = value
+    return pd.Series(arr,index=index)
+
+def _group_positions(df,groupby_cols):
+    """returns the positions of the rows of each group of df, and a dataframe with the first row of each group"""
+    if len(groupby_cols)==0:
+        return [np.arange(len(df))],pd.DataFrame(index=[0])
+    positions = list(df.groupby(groupby_cols,sort=False).indices.values())
+    return positions,df.iloc[[group_positions[0] for group_positions in positions]]
+
+def agg_states(df,schema,agg,**kwargs):
+    """computes the states of mergeable aggregations (see `MergeableAGG`) over the rows of df.
+    Returns a dataframe with a row per group, holding the group by columns and the states of the aggregated columns,
+    which can be merged with the states of other rows using `merge_agg_states`."""
+    uniq_cols_df = rename(df,schema=[i for i in range(len(schema))])
+    groupby_cols = [i for i,agg_func in enumerate(agg) if agg_func is None]
+    positions,states = _group_positions(uniq_cols_df,groupby_cols)
+    for col,agg_func in enumerate(agg):
+        if agg_func is not None:
+            values = uniq_cols_df[col]
+            states[col] = _object_series([agg_func.update(agg_func.init(),values.iloc[group_positions]) for group_positions in positions],states.index)
+    return states[list(range(len(schema)))].reset_index(drop=True)
+
+def merge_agg_states(*states,schema,agg,**kwargs):
+    """merges states of mergeable aggregations computed by `agg_states`, such that each group has a single state"""
+    states = pd.concat([rename(df,schema=[i for i in range(len(schema))]) for df in states],ignore_index=True)
+    groupby_cols = [i for i,agg_func in enumerate(agg) if agg_func is None]
+    positions,merged = _group_positions(states,groupby_cols)
+    for col,agg_func in enumerate(agg):
+        if agg_func is not None:
+            col_states = states[col]
+            merged[col] = _object_series([functools.reduce(agg_func.merge,col_states.iloc[group_positions]) for group_positions in positions],merged.index)
+    return merged[list(range(len(schema)))].reset_index(drop=True)
+
+def finalize_agg_states(states,schema,agg,**kwargs):
+    """computes the aggregated values from the states of mergeable aggregations"""
+    res = rename(states,schema=[i for i in range(len(schema))])
+    for col,agg_func in enumerate(agg):
+        if agg_func is not None:
+            res[col] = [agg_func.finalize_state(state) for state in res[col]]
+    return rename(res,schema)
+
+# %% ../nbs/008_extended_RA_operations.ipynb 62
 def groupby(df,schema,agg,**kwargs):
     if df is None or df.empty:
         return pd.DataFrame(columns=schema)
-    
+
+    if _is_mergeable(agg):
+        # aggregate batches of rows and merge their states, so that the rows are passed to the aggregations in a single pass
+        batches = [df.iloc[start:start+AGG_BATCH_SIZE] for start in range(0,len(df),AGG_BATCH_SIZE)]
+        states = merge_agg_states(*[agg_states(batch,schema,agg) for batch in batches],schema=schema,agg=agg)
+        return finalize_agg_states(states,schema,agg)
+    # mergeable aggregations that are mixed with other aggregations are computed over whole groups
+    agg = [agg_func.__call__ if isinstance(agg_func,MergeableAGG) else agg_func for agg_func in agg]
+
     # rename columns to numbers so that we can aggregate the same free var to multiple places
     uniq_cols_df = rename(df,schema=[i for i in range(len(schema))])
 
@@ -190,7 +519,17 @@ def groupby(df,schema,agg,**kwargs):
             schema)
 
 
-# %% ../nbs/008_extended_RA_operations.ipynb 72
+# %% ../nbs/008_extended_RA_operations.ipynb 84
+def monotone_union(*dfs,schema,lattice,**kwargs):
+    """unions the results of the rules of a recursive relation with aggregated heads, keeping a single row per group.
+    lattice holds None for group by columns and the aggregation that merges the values of a group, 'min' or 'max', for the other columns.
+    Since the merged values only move in one direction, the relation converges in the fixpoint like any other relation."""
+    res = union(*dfs,schema=schema)
+    if res.empty:
+        return res
+    return groupby(res,schema,lattice)
+
+# %% ../nbs/008_extended_RA_operations.ipynb 88
 def coerce_tuple_like(name,func,input,output):
     if isinstance(output,(tuple,list)):
         return output
@@ -210,6 +549,36 @@ def assert_ie_schema(name,func,value,expected_schema,arity,input_or_output='inpu
             f"received an {input_or_output} value {value}(schema={pretty(_infer_relation_schema(value))})\n"
             f"but expected {pretty(expected_schema)}")
 
+# how ie_map checks the inputs and outputs of IE functions against their schemas:
+# 'full' checks every row, 'first' checks the first IE_VALIDATION_ROWS rows of each call,
+# 'sampled' checks every IE_VALIDATION_STRIDE-th row and 'off' checks nothing
+IE_VALIDATION = 'full'
+IE_VALIDATION_ROWS = 100
+IE_VALIDATION_STRIDE = 100
+
+def compile_schema_check(name,func,schema,arity,input_or_output='input',validation=None):
+    """returns a function that checks a row against schema in the given validation mode.
+    Callable schemas are resolved once, so checking a row only compares its length and the types of its values."""
+    if validation is None:
+        validation = IE_VALIDATION
+    if validation not in ('full','first','sampled','off'):
+        raise ValueError(f"Unknown IE validation mode {validation}, expected one of 'full','first','sampled','off'")
+    if validation=='off':
+        return lambda row: None
+    if callable(schema):
+        schema = schema(arity)
+    types = tuple(schema)
+    def check(row):
+        if len(row)!=len(types) or not all(map(isinstance,row,types)):
+            # raises an error that explains the mismatch
+            assert_ie_schema(name,func,row,schema,arity,input_or_output=input_or_output)
+    if validation=='full':
+        return check
+    counter = itertools.count()
+    if validation=='first':
+        return lambda row: check(row) if next(counter)<IE_VALIDATION_ROWS else None
+    return lambda row: check(row) if next(counter)%IE_VALIDATION_STRIDE==0 else None
+
 def assert_iterable(name,func,input,output):
     try:
         out_iter = iter(output)
@@ -218,30 +587,316 @@ def assert_iterable(name,func,input,output):
                 f"returned a value that is not an iterable\n"
                 f"for input {input} -> {output}")
 
-def map_iter(df,name,func,in_schema,out_schema,in_arity,out_arity,**kwargs):
-    """helper function returns an iterator that applies a function to each row of a dataframe
-    """
-    for _,in_row in df.iterrows():
-        in_row = list(in_row)
-        assert_ie_schema(name,func,in_row,in_schema,in_arity,input_or_output='input')
-        output = func(*in_row)
-        assert_iterable(name,func,in_row,output)
+# number of input rows that coroutine IE functions are called on concurrently, unless the IE function sets its own limit
+ASYNC_IE_CONCURRENCY = 32
+
+def _is_async_ie(func):
+    return inspect.iscoroutinefunction(func) or inspect.isasyncgenfunction(func)
+
+async def _call_async_ie(func,in_row):
+    if inspect.isasyncgenfunction(func):
+        return [out_row async for out_row in func(*in_row)]
+    return await func(*in_row)
+
+async def _map_async(func,in_rows,max_concurrency):
+    """calls the coroutine function func on all in_rows with at most max_concurrency calls running at a time,
+    returning the outputs in the order of in_rows"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async def call(in_row):
+        async with semaphore:
+            return await _call_async_ie(func,in_row)
+    return await asyncio.gather(*[call(in_row) for in_row in in_rows])
+
+def _run_coroutine(coro):
+    """runs coro to completion from synchronous code, in a new thread if this thread is already running an event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run,coro).result()
+
+# number of input rows that batched IE functions get in a single call
+IE_BATCH_SIZE = 1024
+
+def _call_batches(name,func,in_rows,batch_size):
+    """calls the batched IE function func on lists of up to batch_size input tuples,
+    and yields each output with the input row it is tagged with"""
+    in_rows = iter(in_rows)
+    while len(batch := list(itertools.islice(in_rows,batch_size)))>0:
+        output = func([tuple(in_row) for in_row in batch])
+        assert_iterable(name,func,batch,output)
+        for tagged in output:
+            if not (isinstance(tagged,(tuple,list)) and len(tagged)==2
+                    and isinstance(tagged[0],(int,np.integer)) and 0<=tagged[0]<len(batch)):
+                raise ValueError(f"Batched IEFunction {name} with underlying function {func}\n"
+                        f"returned {tagged}, but batched IE functions should return (index,output) pairs\n"
+                        f"where index is the position of the input in the batch of {len(batch)} inputs")
+            index,out_row = tagged
+            yield batch[index],[out_row]
+
+def _ie_outputs(name,func,in_rows,out_schema,out_arity,max_concurrency=None,batch=False,validation=None,stats=None):
+    """calls the IE function func on in_rows, yielding (in_row,out_row) pairs, and recording the latency of each call in the `FunctionStats` stats"""
+    if stats is not None:
+        func = stats.timed(func)
+    check_output = compile_schema_check(name,func,out_schema,out_arity,input_or_output='output',validation=validation)
+    if batch:
+        rows_and_outputs = _call_batches(name,func,in_rows,IE_BATCH_SIZE)
+    elif _is_async_ie(func):
+        rows = list(in_rows)
+        if max_concurrency is None:
+            max_concurrency = ASYNC_IE_CONCURRENCY
+        outputs = _run_coroutine(_map_async(func,rows,max_concurrency))
+        rows_and_outputs = zip(rows,outputs)
+    else:
+        rows_and_outputs = ((in_row,func(*in_row)) for in_row in in_rows)
+
+    for in_row,output in rows_and_outputs:
+        try:
+            output = iter(output)
+        except TypeError:
+            assert_iterable(name,func,in_row,output)
         for out_row in output:
-            out_row = coerce_tuple_like(name,func,in_row,out_row)
+            if not isinstance(out_row,(tuple,list)):
+                out_row = coerce_tuple_like(name,func,in_row,out_row)
             out_row = list(out_row)
-            assert_ie_schema(name,func,out_row,out_schema,out_arity,input_or_output='output')
-            yield in_row + out_row
+            check_output(out_row)
+            yield in_row,out_row
+
+# number of input rows sent to the IE executor in each task
+IE_CHUNK_SIZE = 1000
+
+class _SpanRef():
+    """a span sent to an IE executor, given by the index of its document in the list of documents sent along with it"""
+    __slots__ = ('doc_index','start','end','name')
+    def __init__(self,doc_index,start,end,name):
+        self.doc_index = doc_index
+        self.start = start
+        self.end = end
+        self.name = name
+
+def _encode_spans(rows,docs,doc_key=id):
+    """replaces the spans in rows with `_SpanRef`s, adding their documents to docs, a dict from the doc_key of a document to (index,document).
+    Documents are keyed by their id by default, so that equal documents that are distinct objects are kept apart."""
+    def encode(value):
+        if not isinstance(value,Span):
+            return value
+        key = doc_key(value.doc)
+        if key not in docs:
+            docs[key] = (len(docs),value.doc)
+        return _SpanRef(docs[key][0],value.start,value.end,value.name)
+    return [[encode(value) for value in row] for row in rows]
+
+def _decode_spans(rows,docs):
+    """replaces the `_SpanRef`s in rows with spans of the list of documents docs"""
+    def decode(value):
+        if not isinstance(value,_SpanRef):
+            return value
+        return Span(docs[value.doc_index],value.start,value.end,name=value.name)
+    return [[decode(value) for value in row] for row in rows]
+
+def _ie_chunk_task(task):
+    """runs an IE function on a chunk of input rows in a worker of an IE executor.
+    Returns the position in the chunk of the input of each output, the outputs, the documents of output spans that were not sent to the worker,
+    and the stats of the calls if they are recorded"""
+    name,func,out_schema,out_arity,max_concurrency,batch,validation,record_stats,docs,rows = task
+    rows = _decode_spans(rows,docs)
+    row_positions = {id(row):i for i,row in enumerate(rows)}
+    # calls are recorded in stats of the worker, which are merged into the stats of the function
+    stats = FunctionStats(name) if record_stats else None
+    outputs = list(_ie_outputs(name,func,rows,out_schema,out_arity,max_concurrency=max_concurrency,batch=batch,validation=validation,stats=stats))
+    doc_ids = {id(doc):(i,doc) for i,doc in enumerate(docs)}
+    out_rows = _encode_spans([out_row for _,out_row in outputs],doc_ids)
+    new_docs = [doc for _,doc in list(doc_ids.values())[len(docs):]]
+    return [row_positions[id(in_row)] for in_row,_ in outputs],out_rows,new_docs,stats
+
+def _executor_outputs(executor,name,func,in_rows,out_schema,out_arity,max_concurrency=None,batch=False,validation=None,stats=None):
+    """calls the IE function func on chunks of in_rows in the workers of executor, yielding (in_row,out_row) pairs in the order of in_rows.
+    Each document is sent once per chunk and spans are sent as offsets into it, output spans are rebuilt on the documents of the inputs."""
+    in_rows = list(in_rows)
+    chunks = [in_rows[i:i+IE_CHUNK_SIZE] for i in range(0,len(in_rows),IE_CHUNK_SIZE)]
+    chunk_docs = []
+    tasks = []
+    for chunk in chunks:
+        docs = {}
+        rows = _encode_spans(chunk,docs)
+        docs = [doc for _,doc in docs.values()]
+        chunk_docs.append(docs)
+        tasks.append((name,func,out_schema,out_arity,max_concurrency,batch,validation,stats is not None,docs,rows))
+    for chunk,docs,(positions,out_rows,new_docs,worker_stats) in zip(chunks,chunk_docs,executor.map(_ie_chunk_task,tasks)):
+        if stats is not None:
+            stats.merge(worker_stats)
+        out_rows = _decode_spans(out_rows,docs+new_docs)
+        for position,out_row in zip(positions,out_rows):
+            yield chunk[position],out_row
+
+class IECache():
+    """A least recently used cache of the outputs of an IE function, keyed by its input rows.
+    Spans are keyed by the identity of their document and their offsets, so keys never copy the text of spans.
+    The cache holds the input rows of its entries, so the documents of their spans stay alive while they are keyed by identity.
+    The memory held by the entries is counted in nbytes, without the documents of spans which are held by the relations,
+    and `shrink` drops entries to keep it within a memory budget.
+    """
+    def __init__(self,
+        max_size:int=100_000, # maximal number of input rows to keep the outputs of
+        ):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
 
-def ie_map(df,name,func,in_schema,out_schema,in_arity,out_arity,**kwargs):
+    def __repr__(self):
+        return f"IECache({self.stats()})"
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(in_row):
+        """returns the key of in_row, or None if it holds values that can not be hashed"""
+        key = tuple((Span,id(value.doc),value.start,value.end) if isinstance(value,Span) else value for value in in_row)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self,key):
+        """returns the outputs stored for key, or None if they are not cached"""
+        with self._lock:
+            if key is None or key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][1]
+
+    @staticmethod
+    def _entry_nbytes(in_row,out_rows):
+        rows = [in_row,*out_rows]
+        return sys.getsizeof(out_rows) + sum(sys.getsizeof(row)+sum(sys.getsizeof(value) for value in row) for row in rows)
+
+    def put(self,key,in_row,out_rows):
+        if key is None:
+            return
+        with self._lock:
+            if key in self.entries:
+                self.nbytes -= self.entries[key][2]
+            entry_nbytes = self._entry_nbytes(in_row,out_rows)
+            self.entries[key] = (in_row,out_rows,entry_nbytes)
+            self.nbytes += entry_nbytes
+            self.entries.move_to_end(key)
+            while len(self.entries)>self.max_size:
+                self.nbytes -= self.entries.popitem(last=False)[1][2]
+
+    def shrink(self,max_bytes:int)->int:
+        """drops the least recently used entries until the cache holds at most max_bytes, returning the number of bytes dropped"""
+        with self._lock:
+            before = self.nbytes
+            while self.nbytes>max_bytes and len(self.entries)>0:
+                self.nbytes -= self.entries.popitem(last=False)[1][2]
+            return before-self.nbytes
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def stats(self)->Dict[str,int]:
+        return {'hits':self.hits,'misses':self.misses,'size':len(self.entries),'max_size':self.max_size}
+
+def _cached_outputs(cache,compute,in_rows):
+    """yields the (in_row,out_row) pairs of in_rows, computing only the rows that are not in cache with compute"""
+    in_rows = list(in_rows)
+    keys = [cache.key(in_row) for in_row in in_rows]
+    cached = [cache.get(key) for key in keys]
+    missing = [in_row for in_row,out_rows in zip(in_rows,cached) if out_rows is None]
+    computed = defaultdict(list)
+    for in_row,out_row in compute(missing):
+        computed[id(in_row)].append(out_row)
+    for in_row,key,out_rows in zip(in_rows,keys,cached):
+        if out_rows is None:
+            out_rows = computed[id(in_row)]
+            cache.put(key,in_row,out_rows)
+        for out_row in out_rows:
+            yield in_row,out_row
+
+def _map_outputs(in_rows,name,func,out_schema,out_arity,max_concurrency=None,batch=False,executor=None,cache=None,
+                 store=None,store_version=None,validation=None,stats=None):
+    """yields the (in_row,out_row) pairs of the IE function func on in_rows"""
+    def compute(rows):
+        if executor is None:
+            return _ie_outputs(name,func,rows,out_schema,out_arity,max_concurrency=max_concurrency,batch=batch,validation=validation,stats=stats)
+        return _executor_outputs(executor,name,func,rows,out_schema,out_arity,max_concurrency=max_concurrency,batch=batch,validation=validation,stats=stats)
+    if store is not None:
+        compute = functools.partial(store.outputs,name,store_version,compute)
+
+    if cache is None:
+        return compute(in_rows)
+    return _cached_outputs(cache,compute,in_rows)
+
+def _df_rows(df):
+    """yields the rows of df as lists, zipping its columns instead of building a Series per row like `df.iterrows`"""
+    if len(df.columns)==0:
+        return ([] for _ in range(len(df)))
+    columns = [df.iloc[:,i].tolist() for i in range(len(df.columns))]
+    return (list(row) for row in zip(*columns))
+
+def ie_map(df,name,func,in_schema,out_schema,in_arity,out_arity,max_concurrency=None,batch=False,executor=None,cache=None,
+           store=None,store_version=None,validation=None,dedupe=False,stats=None,**kwargs):
     """given an indexed dataframe, apply an ie function to each row and return the output 
-    such that each output relation is indexed by the same index as the input relation that generated it
+    such that each output relation is indexed by the same index as the input relation that generated it.
+    The input columns of the result are taken from df by the positions of the input rows of each output, so they keep their dtypes,
+    and the values of the output columns are appended to a list per column.
+    Coroutine functions and async generators are called on up to max_concurrency rows concurrently,
+    and batched functions are called on lists of input tuples and return (index,output) pairs.
+    If executor is given, for example a process pool, chunks of rows are computed by its workers,
+    and if an `IECache` or an `IEResultStore` are given, the function is called only on rows whose outputs are not cached or stored.
+    Rows are checked against the schemas of the function according to the validation mode, see `IE_VALIDATION`,
+    and if a `FunctionStats` is given, calls, rows and errors of the function are counted in it.
+    If dedupe is True, the function is called once per distinct input row and its outputs are repeated for the equal rows,
+    which assumes the function returns the same outputs for the same inputs
     """
     if df is None or df.empty:
         return pd.DataFrame(columns=_col_names(in_arity+out_arity))
-    output_iter = map_iter(df,name,func,in_schema,out_schema,in_arity,out_arity)
-    total_arity = in_arity + out_arity
-    return pd.DataFrame(output_iter,columns=_col_names(total_arity))
-
-
-
-
+    check_input = compile_schema_check(name,func,in_schema,in_arity,input_or_output='input',validation=validation)
+    # input rows are kept alive until the outputs are collected, so their ids identify their positions in df,
+    # along with the positions of the rows equal to them if dedupe is True
+    rows = []
+    row_positions = {}
+    distinct = {}
+    for position,in_row in enumerate(_df_rows(df)):
+        key = IECache.key(in_row) if dedupe else None
+        if key is not None and key in distinct:
+            distinct[key].append(position)
+            continue
+        check_input(in_row)
+        row_positions[id(in_row)] = [position]
+        if key is not None:
+            distinct[key] = row_positions[id(in_row)]
+        rows.append(in_row)
+    outputs = _map_outputs(rows,name,func,out_schema,out_arity,max_concurrency=max_concurrency,batch=batch,executor=executor,
+                           cache=cache,store=store,store_version=store_version,validation=validation,stats=stats)
+
+    positions = []
+    out_columns = [[] for _ in range(out_arity)]
+    appends = [column.append for column in out_columns]
+    for in_row,out_row in outputs:
+        for position in row_positions[id(in_row)]:
+            positions.append(position)
+            for append,value in zip(appends,out_row):
+                append(value)
+
+    col_names = _col_names(in_arity+out_arity)
+    res = df.iloc[positions].reset_index(drop=True)
+    res.columns = col_names[:in_arity]
+    for col_name,column in zip(col_names[in_arity:],out_columns):
+        res[col_name] = column
+    if len(rows)<len(df):
+        # outputs of repeated rows were collected with the first of them, put them back in the order of the input
+        res = res.iloc[np.argsort(positions,kind='stable')].reset_index(drop=True)
+    if stats is not None:
+        stats.record_rows(len(df),len(res))
+    return res
@@ -8,6 +8,10 @@ import csv
 
 import os
 import re
+import asyncio
+import functools
+import threading
+from concurrent.futures import CancelledError,Executor
 from pathlib import Path
 from typing import Tuple, List, Union, Optional, Callable, Type, Iterable, no_type_check, Sequence
 from fastcore.basics import patch
@@ -33,11 +37,16 @@ from spannerlib.data_types import (
     Relation,
     IEFunction,
     AGGFunction,
+    MergeableAGG,
     IERelation,
     Rule,
     pretty,
 )
 from .engine import Engine
+from .ra import IECache,ie_map
+from .ie_store import IEResultStore
+from .metrics import stats_frame,prometheus_text
+from .storage import DiskRelation,write_disk_relation
 
 from spannerlib.micro_passes import (
     convert_primitive_values_to_objects,
@@ -74,6 +83,12 @@ def _class_repr(x):
 class Session():
     def __init__(self,
     register_stdlib=True, # if True, registers the standard library of IEs and AGGs
+    backend=None, # the backend implementing relational operators, for example `PolarsBackend()`, defaults to pandas
+    memory_budget=None, # the number of bytes relations and intermediate results can hold in memory before caches are evicted and intermediate results are spilled to disk, None for no limit
+    spill_dir=None, # directory to spill intermediate results to when the memory budget is exceeded, defaults to a temporary directory
+    ie_executor=None, # a process or thread pool that computes chunks of the inputs of IE functions, unless they are registered with their own executor
+    ie_store=None, # path of an `IEResultStore`, or the store itself, keeping the outputs of IE functions registered with a version across runs
+    semijoin_reduction=False, # if True, the inputs of joins over acyclic rule bodies are reduced with semi joins before they are joined
     ):
         """
         A Session object is the main interface to the spannerlog engine. 
@@ -95,6 +110,12 @@ class Session():
             assignments_to_name_val_tuple,
         ]
 
+        self.backend = backend
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.ie_executor = ie_executor
+        self.semijoin_reduction = semijoin_reduction
+        self.ie_store = IEResultStore(ie_store) if isinstance(ie_store,(str,Path)) else ie_store
         self.clear(register_stdlib=register_stdlib)
 
 # %% ../nbs/030_session.ipynb 7
@@ -103,7 +124,8 @@ def clear(self:Session,
     register_stdlib=True, # if True, registers the standard library of IEs and AGGs
     ):
     """Resets the engine and clears all relations, functions and rules."""
-    self.engine = Engine()
+    self.engine = Engine(backend=self.backend,memory_budget=self.memory_budget,spill_dir=self.spill_dir,ie_executor=self.ie_executor,
+        semijoin_reduction=self.semijoin_reduction)
     if not register_stdlib:
         return
     _load_stdlib()
@@ -120,9 +142,31 @@ def register(self:Session,
     func, # the python function that implements the IE
     in_schema, # the schema of the input relation
     out_schema, # the schema of the output relation
+    max_concurrency=None, # for `async def` functions and async generators, the number of input rows they are called on concurrently
+    batch=False, # if True, func is called on a list of input tuples and returns (index,output) pairs, where index is the position of the input that produced output
+    executor=None, # a process or thread pool that computes chunks of the input rows, for CPU bound functions, defaults to the executor of the session
+    cache_size=None, # if given, the outputs of up to cache_size input rows are cached across queries, and the function is called only on new rows
+    version=None, # if given, outputs are kept in the IE result store of the session under this version, change it whenever the outputs of func change
+    validation=None, # how rows are checked against the schemas: 'full', 'first' rows only, 'sampled' rows or 'off', defaults to `ra.IE_VALIDATION`
+    dedupe=True, # if True, func is called once per distinct input row, set to False for functions whose outputs vary between calls
     ):
-    """Registers an IE function with the spannerlog engine."""
-    ie_func_obj = IEFunction(name=name,func=func,in_schema=in_schema,out_schema=out_schema)
+    """Registers an IE function with the spannerlog engine.
+    IE functions can be coroutine functions or async generators, for example when they call a remote service,
+    in which case they are called on many input rows concurrently.
+    Batched IE functions get many input rows in a single call, which suits libraries that process inputs in batches,
+    like model inference or spacy's `nlp.pipe`.
+    CPU bound IE functions can run on a process pool given as executor, in which case func must be picklable.
+    Caching outputs assumes func returns the same outputs for the same inputs, registering func again clears its cache.
+    Functions registered with a version keep their outputs in the `IEResultStore` of the session under name,
+    so later runs reuse them for unchanged inputs.
+    For trusted functions on large inputs, checking only some rows against the schemas saves time."""
+    cache = IECache(max_size=cache_size) if cache_size is not None else None
+    if version is not None and self.ie_store is None:
+        raise ValueError(f"IE function {name} is registered with version {version}, but the session has no ie_store to keep its outputs in")
+    store = self.ie_store if version is not None else None
+    ie_func_obj = IEFunction(name=name,func=func,in_schema=in_schema,out_schema=out_schema,
+                             max_concurrency=max_concurrency,batch=batch,executor=executor,cache=cache,
+                             store=store,version=version,validation=validation,dedupe=dedupe)
     self.engine.set_ie_function(ie_func_obj)
 
 
@@ -130,11 +174,12 @@ def register(self:Session,
 @patch
 def register_agg(self:Session,
         name, # name of the AGG function in spannerlog
-        func, # the python function that implements the AGG
+        func, # the python function that implements the AGG, or a MergeableAGG that is computed over batches of rows and merged
         in_schema, # the schema of the input relation, can be of arity 1 only
         out_schema # the schema of the output relation, can be of arity 1 only
     ):
-    """Registers an AGG function with the spannerlog engine."""
+    """Registers an AGG function with the spannerlog engine.
+    Aggregations given as a `MergeableAGG` are computed in a single pass over batches of rows, and in parallel by backends that support it."""
     agg_func_obj = AGGFunction(name=name,func=func,in_schema=in_schema,out_schema=out_schema)
     self.engine.set_agg_function(agg_func_obj)
 
@@ -143,18 +188,34 @@ def register_agg(self:Session,
 @patch
 def import_rel(self:Session,
     name:str, # name of the relation in spannerlog
-    data:Union[str,Path,pd.DataFrame], # either a pandas dataframe or a path to a csv file
+    data:Union[str,Path,pd.DataFrame], # either a pandas dataframe, a path to a csv file or a directory of a relation stored on disk
     delim:str = None, # the delimiter of the csv file
     header = None, # the header of the csv file
+    on_disk:Union[str,Path] = None, # if given, the relation is stored in this directory on disk and scanned lazily instead of being held in memory
+    chunk_size:int = 100_000, # number of rows per chunk when storing the relation on disk
     ):
-    """Imports a relation into the current session, either from a dataframe or from a csv file."""
+    """Imports a relation into the current session, either from a dataframe or from a csv file.
+    Relations that are larger than memory can be stored on disk using `on_disk`, or imported from a directory previously written to disk.
+    """
+    if isinstance(data, (Path,str)) and Path(data).is_dir():
+        self._import_disk_rel(name,DiskRelation(data))
+        return
+
     if isinstance(data, (Path,str)):
         csv_file_name = Path(data)
         if not csv_file_name.is_file():
             raise IOError("csv file does not exist")
         if os.stat(csv_file_name).st_size == 0:
             raise IOError("csv file is empty")
-        data = pd.read_csv(csv_file_name, delimiter=delim,header=header)
+        if on_disk is not None:
+            # read the csv lazily so that it is never held in memory as a whole
+            data = pd.read_csv(csv_file_name, delimiter=delim,header=header,chunksize=chunk_size)
+        else:
+            data = pd.read_csv(csv_file_name, delimiter=delim,header=header)
+
+    if on_disk is not None:
+        self._import_disk_rel(name,write_disk_relation(on_disk,data,chunk_size=chunk_size))
+        return
 
     first_row = list(data.iloc[0,:])
     scheme = _infer_relation_schema(first_row)
@@ -162,6 +223,14 @@ def import_rel(self:Session,
     self.engine.set_relation(rel_def)
     self.engine.add_facts(name,data)
 
+@patch
+def _import_disk_rel(self:Session,name:str,disk_rel:DiskRelation):
+    first_row = list(disk_rel.head(1).iloc[0,:])
+    scheme = _infer_relation_schema(first_row)
+    rel_def = RelationDefinition(name=name,scheme=scheme)
+    self.engine.set_relation(rel_def)
+    self.engine.set_disk_relation(name,disk_rel)
+
 
 # %% ../nbs/030_session.ipynb 12
 @patch
@@ -226,6 +295,7 @@ def _execute_statement(
     engine, # the spannerlog engine to execute the statement on
     plan_only=False, # if True, plans queries returns the graph and root, but does not execute them
     draw_graph=False, # if True, draws the graph of the query plan
+    cancel=None, # a threading.Event, once it is set queries stop before their next operator with a CancelledError
     ):
     """executes a single statement from the ast
     """
@@ -249,7 +319,7 @@ def _execute_statement(
                 draw(graph)
             if plan_only:
                 return graph,root
-            return engine.execute_plan(graph,root)
+            return engine.execute_plan(graph,root,cancel=cancel)
         case _:
             raise ValueError(f"Unknown statement type {statement}")
     return None
@@ -318,6 +388,7 @@ def export(self:Session,
     draw_query=False, # if True, draws the query graph of queries to screen
     plan_query=False, # if True, if last statement is a query, plans the query and returns the query graph and root node.
     return_statements_meta=False, # if True, returns both the return value and the statements meta data, used internally.
+    cancel=None, # a threading.Event, once it is set execution stops before the next statement or query operator with a CancelledError
     ):
     """Takes a string of spannerlog code, and executes it, returning the value of the last statement in the code string.
     All statements that are not queries, return None.
@@ -330,9 +401,13 @@ def export(self:Session,
     for statement_index,(clean_ast,statement_lark) in enumerate(self._check_semantics(parsed_statements)):
         is_last_statement = statement_index == num_statements - 1
         plan_only = plan_query and is_last_statement
+        if cancel is not None and cancel.is_set():
+            raise CancelledError(f"execution was cancelled before statement \"{reconstruct(statement_lark)}\"")
         try:
-            result = _execute_statement(clean_ast,self.engine,draw_graph=draw_query,plan_only=plan_only)
+            result = _execute_statement(clean_ast,self.engine,draw_graph=draw_query,plan_only=plan_only,cancel=cancel)
             result = _format_results(result)
+        except CancelledError as e:
+            raise e
         except Exception as e:
             print(f"RUNTIME ERROR:\n"
                 f"During execution of statement \n\"{reconstruct(statement_lark)}\"\n"
@@ -357,6 +432,43 @@ def export(self:Session,
         return ret_val
 
 # %% ../nbs/030_session.ipynb 18
+async def _run_cancellable(func,executor=None):
+    """runs func(cancel=event) in executor without blocking the event loop,
+    and sets the event if the awaiting task is cancelled so that func stops early"""
+    cancel = threading.Event()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor,functools.partial(func,cancel=cancel))
+    except asyncio.CancelledError as e:
+        cancel.set()
+        raise e
+
+@patch
+async def export_async(self:Session,
+    code:str, # the spannerlog code to execute
+    executor:Optional[Executor]=None, # the executor to run the code in, defaults to the executor of the event loop
+    **kwargs, # keyword arguments of `Session.export`
+    ):
+    """Like `Session.export`, but plans and executes the code in an executor instead of blocking the event loop.
+    Queries run on snapshots of the session, so many of them can be awaited concurrently.
+    Cancelling the awaiting task stops the execution before the next statement or query operator.
+    """
+    return await _run_cancellable(functools.partial(self.export,code,**kwargs),executor)
+
+@patch
+async def import_rel_async(self:Session,
+    name:str, # name of the relation in spannerlog
+    data:Union[str,Path,pd.DataFrame], # either a pandas dataframe, a path to a csv file or a directory of a relation stored on disk
+    executor:Optional[Executor]=None, # the executor to run the import in, defaults to the executor of the event loop
+    **kwargs, # keyword arguments of `Session.import_rel`
+    ):
+    """Like `Session.import_rel`, but reads and adds the facts in an executor instead of blocking the event loop.
+    Cancelling the awaiting task does not stop an import that already started, so relations are never partially imported.
+    """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(executor,functools.partial(self.import_rel,name,data,**kwargs))
+
+# %% ../nbs/030_session.ipynb 19
 @patch  
 def print_rules(self:Session):
     """Prints all the rules in the engine. and returns them as a list"""
@@ -378,8 +490,63 @@ def get_all_functions(self:Session):
         'agg':self.engine.agg_functions.copy()
     }
 
+@patch
+def stats(self:Session)->pd.DataFrame:
+    """Returns the calls, input and output rows, errors and latency of each IE and aggregation function run by the session so far,
+    sorted by their total latency. Latency percentiles are estimated from a sample of the calls, see `metrics.FunctionStats`"""
+    return stats_frame(self.engine.function_stats.values())
+
+@patch
+def prometheus_stats(self:Session,
+    prefix:str='spannerlib', # prefix of the metric names
+    )->str:
+    """Returns the stats of the IE and aggregation functions of the session in the Prometheus text exposition format,
+    for example to serve them from a metrics endpoint"""
+    return prometheus_text(self.engine.function_stats.values(),prefix=prefix)
+
+@patch
+def ie_cache_stats(self:Session):
+    """Returns the hits, misses and size of the cache of each IE function that caches its outputs, as a dictionary from the function name to its stats"""
+    return {name:ie_func.cache.stats() for name,ie_func in self.engine.ie_functions.items() if ie_func.cache is not None}
 
-# %% ../nbs/030_session.ipynb 21
+@patch
+def ie_store_info(self:Session)->pd.DataFrame:
+    """Returns the number of input rows whose outputs are kept in the IE result store, for each function and version"""
+    return self.ie_store.info()
+
+@patch
+def warm_ie_store(self:Session,
+    name:str, # name of an IE function registered with a version
+    data:pd.DataFrame, # input rows of the function
+    out_arity:Optional[int]=None, # arity of the outputs, needed only if the output schema of the function depends on it
+    ):
+    """Computes the outputs of the IE function name on data ahead of time, and keeps them in the IE result store.
+    Inputs whose outputs are already stored are not computed again."""
+    ie_func = self.engine.get_ie_function(name)
+    if ie_func is None or ie_func.store is None:
+        raise ValueError(f"IE function {name} is not registered with a version, so its outputs are not stored")
+    if out_arity is None:
+        out_arity = len(ie_func.out_schema)
+    ie_map(data,name,ie_func.func,ie_func.in_schema,ie_func.out_schema,in_arity=len(data.columns),out_arity=out_arity,
+           max_concurrency=ie_func.max_concurrency,batch=ie_func.batch,executor=ie_func.executor or self.ie_executor,
+           store=ie_func.store,store_version=ie_func.version,validation=ie_func.validation,dedupe=ie_func.dedupe,
+           stats=self.engine.get_function_stats('ie',name))
+
+@patch
+def purge_ie_store(self:Session,
+    name:Optional[str]=None, # name of a registered IE function, whose outputs are removed, all outputs are removed if None
+    stale_only:bool=False, # if True, removes only the outputs of versions other than the registered version of name
+    )->int:
+    """Removes outputs from the IE result store, returning the number of input rows whose outputs were removed"""
+    if name is None:
+        return self.ie_store.purge()
+    ie_func = self.engine.get_ie_function(name)
+    if ie_func is None:
+        raise ValueError(f"IE function {name} is not registered")
+    return self.ie_store.purge(name,keep_version=ie_func.version if stale_only else None)
+
+
+# %% ../nbs/030_session.ipynb 22
 @patch
 def remove_rule(self:Session,
     rule:str # the rule string to remove
@@ -389,7 +556,7 @@ def remove_rule(self:Session,
     self.engine.del_rule(rule)
 
 
-# %% ../nbs/030_session.ipynb 22
+# %% ../nbs/030_session.ipynb 23
 @patch
 def remove_head(self:Session,head:str):
     """removes all rules of a given head relation
@@ -397,7 +564,7 @@ def remove_head(self:Session,head:str):
     self.engine.del_head(head)
 
 
-# %% ../nbs/030_session.ipynb 23
+# %% ../nbs/030_session.ipynb 24
 @patch
 def remove_all_rules(self:Session):
     """removes all rules from the engine
@@ -407,7 +574,7 @@ def remove_all_rules(self:Session):
         self.remove_rule(rule)
 
 
-# %% ../nbs/030_session.ipynb 24
+# %% ../nbs/030_session.ipynb 25
 @patch
 def remove_relation(self:Session,relation:str):
     """removes a relation from the engine, either a extrinsic or intrinsic relation
@@ -416,7 +583,29 @@ def remove_relation(self:Session,relation:str):
 
 
 
-# %% ../nbs/030_session.ipynb 26
+# %% ../nbs/030_session.ipynb 27
+@patch
+def save(self:Session,
+    path:Union[str,Path], # directory to save the session to
+    ):
+    """Saves the relations, rules and variables of the session to a directory,
+    so that they can be loaded without reimporting and reparsing them.
+    Registered IE and aggregation functions are not saved.
+    """
+    self.engine.save(path)
+
+@patch
+def load(self:Session,
+    path:Union[str,Path], # directory the session was saved to
+    ):
+    """Loads relations, rules and variables saved with `Session.save`, replacing the current ones.
+    IE and aggregation functions registered in this session are kept,
+    any custom functions used by the loaded rules should be registered before querying them.
+    """
+    self.engine.load(path)
+
+
+# %% ../nbs/030_session.ipynb 29
 def test_session(
     code_strings,
     expected_outputs=None,# list of expected dfs
@@ -0,0 +1,515 @@
+"""Compiling query graphs to SQL and running them on an embedded database"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/013_sql_backend.ipynb.
+
+# %% auto 0
+__all__ = ['logger', 'SQLBackend']
+
+# %% ../nbs/013_sql_backend.ipynb 3
+import os
+import sqlite3
+import tempfile
+import itertools
+import threading
+import weakref
+from concurrent.futures import CancelledError
+import numpy as np
+import pandas as pd
+import networkx as nx
+from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union
+import logging
+logger = logging.getLogger(__name__)
+
+from .ra import equalConstTheta,equalColTheta
+from .engine import Backend,DB,compute_node,get_rel,_check_cancelled
+from .storage import DiskRelation
+
+# %% ../nbs/013_sql_backend.ipynb 6
+class _ValueCodec():
+    """translates python values to sqlite values and back.
+    Numbers and strings are stored as they are, any other value (Spans, booleans, etc) is interned and stored as a blob holding its id,
+    so that equal values are stored as equal blobs and can be joined on.
+    A codec can extend a parent codec, values interned by the parent are encoded as the parent encodes them
+    and other values get ids that do not overlap the ids of the parent.
+    """
+    def __init__(self,parent=None):
+        self.parent = parent
+        self.first_id = 0 if parent is None else 2**62
+        self.ids = {}
+        self.values = []
+
+    def encode(self,val):
+        if isinstance(val,np.generic):
+            val = val.item()
+        if val is None or (isinstance(val,float) and val!=val):
+            return None
+        if type(val) in (int,float,str):
+            return val
+        if self.parent is not None and val in self.parent.ids:
+            return self.parent.encode(val)
+        if val not in self.ids:
+            self.ids[val] = len(self.values)
+            self.values.append(val)
+        return (self.first_id+self.ids[val]).to_bytes(8,'big')
+
+    def encode_column(self,col:pd.Series)->List:
+        """encodes the values of a column, integer and float columns are converted as a whole"""
+        if col.dtype.kind in 'iu':
+            return col.tolist()
+        if col.dtype.kind == 'f':
+            return [None if val!=val else val for val in col.tolist()]
+        return [self.encode(val) for val in col]
+
+    def decode(self,val):
+        if isinstance(val,bytes):
+            val_id = int.from_bytes(val,'big')
+            if val_id < self.first_id:
+                return self.parent.decode(val)
+            return self.values[val_id-self.first_id]
+        return val
+
+    def literal(self,val):
+        """renders val as an sql literal"""
+        val = self.encode(val)
+        if val is None:
+            return 'NULL'
+        if isinstance(val,bytes):
+            return f"X'{val.hex()}'"
+        if isinstance(val,str):
+            return "'" + val.replace("'","''") + "'"
+        return repr(val)
+
+# %% ../nbs/013_sql_backend.ipynb 9
+class _Block():
+    """A select-project-join query, the cross product of sources filtered by conds, returning exprs.
+    Chains of renames, projects, selects and joins are compiled into a single block,
+    so that sqlite can plan them together and recursive references stay at the top level of the query.
+    """
+    def __init__(self,sources=None,conds=None,exprs=None):
+        self.sources = sources if sources is not None else []
+        self.conds = conds if conds is not None else []
+        self.exprs = exprs if exprs is not None else []
+
+    def merge(self,other,exprs):
+        return _Block(self.sources+other.sources,self.conds+other.conds,exprs)
+
+    def sql(self):
+        # relations without columns are represented by a dummy column, holding a single row if the relation is true
+        if len(self.exprs)==0:
+            sql = 'SELECT DISTINCT 1 AS c0'
+        else:
+            sql = 'SELECT ' + ', '.join(f'{expr} AS c{i}' for i,expr in enumerate(self.exprs))
+        if len(self.sources)>0:
+            sql += ' FROM ' + ', '.join(self.sources)
+        if len(self.conds)>0:
+            sql += ' WHERE ' + ' AND '.join(self.conds)
+        return sql
+
+# %% ../nbs/013_sql_backend.ipynb 10
+_SQL_AGGS = {
+    'count':'COUNT',
+    'sum':'SUM',
+    'min':'MIN',
+    'max':'MAX',
+    'mean':'AVG',
+}
+
+_SPJ_OPS = {'rename','project','select','join','multiway_join','product','get_const'}
+_SET_OPS = {'union':'UNION','intersection':'INTERSECT','difference':'EXCEPT'}
+
+def _staged_outputs(*children,**kwargs):
+    return None
+
+class _SQLProgram():
+    """compiles a query graph into tables and views of a sqlite database and evaluates it.
+
+    The strongly connected components of the graph are processed bottom up:
+
+    * relational nodes are compiled into views, or inlined into the query of their only parent
+    * recursive components with a single union whose recursive rules reference it once are compiled into a `WITH RECURSIVE` query
+    * other nodes, such as IE functions, and other recursive components are staged,
+    their inputs are read from the database, evaluated with the python operators of the backend and the outputs are written back
+    * base relations are read from the tables of base_tables, which are kept between queries
+
+    The tables and views of the program are dropped by `drop`.
+    """
+    def __init__(self,G,base_tables,backend,cancel=None):
+        self.G = G
+        self.base_tables = base_tables
+        self.conn = base_tables.conn
+        self.backend = backend
+        # staged components are computed from a single node above the nodes they output
+        self.staged_backend = Backend(name=backend.name,**backend,staged_outputs=_staged_outputs)
+        self.cancel = cancel
+        # values interned by the program are only used by this query, so they are not added to the codec of the base tables
+        self.codec = _ValueCodec(parent=base_tables.codec)
+        prefix = f'q{next(base_tables.query_counter)}_'
+        self.names = {u:f'{prefix}n{i}' for i,u in enumerate(G.nodes)}
+        self.created = []
+        self.materialized = set()
+        self.alias_counter = itertools.count()
+        self.recursive_ref = None
+        self.recursive_ref_count = 0
+        self.root = None
+        self.statements = []
+
+    def execute(self,sql,params=None):
+        logger.debug(f"executing sql: {sql}")
+        self.statements.append(sql)
+        return self.conn.execute(sql) if params is None else self.conn.executemany(sql,params)
+
+    def arity(self,u):
+        return len(self.G.nodes[u]['schema'])
+
+    def _scan(self,table,arity):
+        alias = f't{next(self.alias_counter)}'
+        return _Block([f'{table} AS {alias}'],[],[f'{alias}.c{i}' for i in range(arity)])
+
+    def _derived(self,sql,arity):
+        return self._scan(f'({sql})',arity)
+
+    def block(self,u):
+        """compiles node u into a block"""
+        if self.recursive_ref is not None and u == self.recursive_ref[0]:
+            self.recursive_ref_count += 1
+            return self._scan(self.recursive_ref[1],self.arity(u))
+        if u in self.materialized:
+            return self._scan(self.names[u],self.arity(u))
+
+        data = self.G.nodes[u]
+        op = data['op']
+        children = list(self.G.successors(u))
+        child_schemas = [self.G.nodes[v]['schema'] for v in children]
+
+        if op == 'rename':
+            return self.block(children[0])
+        elif op == 'project':
+            b = self.block(children[0])
+            b.exprs = [b.exprs[child_schemas[0].index(col)] for col in data['schema']]
+            return b
+        elif op == 'select':
+            b = self.block(children[0])
+            theta = data['theta']
+            if isinstance(theta,equalConstTheta):
+                b.conds += [f'{b.exprs[pos]} = {self.codec.literal(val)}' for pos,val in theta.pos_val_tuples]
+            else:
+                b.conds += [f'{b.exprs[pos1]} = {b.exprs[pos2]}' for pos1,pos2 in theta.col_pos_tuples]
+            return b
+        elif op == 'get_const':
+            return _Block(exprs=[self.codec.literal(val) for val in data['const_dict'].values()])
+        elif op == 'product':
+            b1,b2 = self.block(children[0]),self.block(children[1])
+            return b1.merge(b2,b1.exprs+b2.exprs)
+        elif op in ('join','multiway_join'):
+            # sqlite plans multiway joins like any other join of several sources
+            b = _Block()
+            exprs_by_col = {}
+            for v,schema in zip(children,child_schemas):
+                child_b = self.block(v)
+                for col,expr in zip(schema,child_b.exprs):
+                    if col in exprs_by_col:
+                        child_b.conds.append(f'{exprs_by_col[col]} = {expr}')
+                    else:
+                        exprs_by_col[col] = expr
+                b = b.merge(child_b,[])
+            b.exprs = [exprs_by_col[col] for col in data['schema']]
+            return b
+        elif op in _SET_OPS:
+            sql = f' {_SET_OPS[op]} '.join(self.block(v).sql() for v in children)
+            if len(children)==1:
+                sql = f'SELECT DISTINCT * FROM ({sql})'
+            return self._derived(sql,self.arity(u))
+        elif op == 'groupby':
+            b = self.block(children[0])
+            group_by = [expr for expr,agg in zip(b.exprs,data['agg']) if agg is None]
+            b.exprs = [expr if agg is None else f'{_SQL_AGGS[agg]}({expr})' for expr,agg in zip(b.exprs,data['agg'])]
+            sql = b.sql()
+            if len(group_by)>0:
+                sql += ' GROUP BY ' + ', '.join(group_by)
+            else:
+                # pandas returns no rows when aggregating an empty relation
+                sql += ' HAVING COUNT(*)>0'
+            return self._derived(sql,self.arity(u))
+        raise ValueError(f'can not compile node {u} with op {op} to sql')
+
+    def _holds_objects(self,u,positions):
+        cond = ' OR '.join(f"typeof(c{i})='blob'" for i in positions)
+        return self.execute(f'SELECT 1 FROM ({self.block(u).sql()}) WHERE {cond} LIMIT 1').fetchone() is not None
+
+    def compilable(self,u):
+        data = self.G.nodes[u]
+        op = data['op']
+        if op in ('rename','project','join','multiway_join','product','get_const') or op in _SET_OPS:
+            return True
+        if op == 'select':
+            return isinstance(data['theta'],(equalConstTheta,equalColTheta))
+        if op == 'groupby':
+            if not all(agg is None or (isinstance(agg,str) and agg in _SQL_AGGS) for agg in data['agg']):
+                return False
+            # interned values can be counted but not ordered or summed in sql
+            agg_positions = [i for i,agg in enumerate(data['agg']) if agg is not None and agg!='count']
+            child = next(iter(self.G.successors(u)))
+            return len(agg_positions)==0 or not self._holds_objects(child,agg_positions)
+        return False
+
+    def frame(self,u):
+        """reads the rows of node u into a dataframe"""
+        rows = self.execute(self.block(u).sql()).fetchall()
+        schema = self.G.nodes[u]['schema']
+        if len(schema)==0:
+            return pd.DataFrame(index=range(len(rows))) if len(rows)>0 else pd.DataFrame()
+        rows = [tuple(self.codec.decode(val) for val in row) for row in rows]
+        return pd.DataFrame(rows,columns=schema)
+
+    def insert(self,table,df,arity,codec):
+        """creates table and writes the rows of df into it, encoding their values with codec"""
+        columns = ', '.join(f'c{i}' for i in range(max(arity,1)))
+        if arity==0:
+            rows = [(1,)] if df is not None and len(df)>0 else []
+        else:
+            # values are encoded column by column, so numeric columns are not converted value by value
+            rows = [] if df is None else list(zip(*(codec.encode_column(df.iloc[:,i]) for i in range(arity))))
+        placeholders = ', '.join('?' for _ in range(max(arity,1)))
+        # the table is created and filled in a single transaction, so an interrupted insert leaves no table behind
+        self.conn.execute('BEGIN')
+        try:
+            self.execute(f'CREATE TABLE {table} ({columns})')
+            self.execute(f'INSERT INTO {table} VALUES ({placeholders})',rows)
+        except BaseException:
+            if self.conn.in_transaction:
+                self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    def store(self,u,df):
+        """writes df into a table holding the rows of node u"""
+        self.created.append(('TABLE',self.names[u]))
+        self.insert(self.names[u],df,self.arity(u),self.codec)
+        self.materialized.add(u)
+
+    def create_view(self,u):
+        self.created.append(('VIEW',self.names[u]))
+        self.execute(f'CREATE VIEW {self.names[u]} AS {self.block(u).sql()}')
+        self.materialized.add(u)
+
+    def drop(self):
+        """drops the tables and views created by the program"""
+        for kind,name in reversed(self.created):
+            self.conn.execute(f'DROP {kind} IF EXISTS {name}')
+        self.created = []
+
+    def stage(self,nodes):
+        """evaluates nodes with the python operators of the backend and stores the ones read by other nodes"""
+        nodes = set(nodes)
+        inputs = {v for u in nodes for v in self.G.successors(u) if v not in nodes}
+        outputs = [u for u in nodes if u == self.root or any(p not in nodes for p in self.G.predecessors(u))]
+        db = DB({self.names[v]:self.frame(v) for v in inputs})
+        H = nx.DiGraph(nx.subgraph(self.G,nodes|inputs))
+        for v in inputs:
+            H.remove_edges_from(list(H.out_edges(v)))
+            H.nodes[v].clear()
+            H.nodes[v].update(op='get_rel',rel=self.names[v],db=db,schema=self.G.nodes[v]['schema'])
+        # like the engine, run the fixpoint from a node above the component, so that the component is computed once for all its outputs
+        staged_root = ('staged',)
+        H.add_node(staged_root,op='staged_outputs',schema=[])
+        H.add_edges_from((staged_root,u) for u in outputs)
+        _,results = compute_node(H,staged_root,ret_inter=True,backend=self.staged_backend,cancel=self.cancel)
+        for u in outputs:
+            self.store(u,results[u][-1])
+
+    def recursive_sql(self,component):
+        """compiles a recursive component into a `WITH RECURSIVE` query, or returns None if it can not be compiled"""
+        unions = [u for u in component if self.G.nodes[u]['op']=='union']
+        if len(unions)!=1 or self.arity(unions[0])==0:
+            return None
+        union = unions[0]
+        others = component - {union}
+        if any(self.G.nodes[u]['op'] not in _SPJ_OPS or not self.compilable(u) for u in others):
+            return None
+        if not nx.is_directed_acyclic_graph(nx.subgraph(self.G,others)):
+            return None
+        base = [v for v in self.G.successors(union) if v not in component]
+        recursive = [v for v in self.G.successors(union) if v in component]
+        if len(base)==0:
+            return None
+
+        cte = f'r{self.names[union]}'
+        self.recursive_ref = (union,cte)
+        try:
+            recursive_sqls = []
+            for v in recursive:
+                # sqlite allows a single reference to the recursive table in each recursive select
+                self.recursive_ref_count = 0
+                sql = self.block(v).sql()
+                if self.recursive_ref_count != 1:
+                    return None
+                recursive_sqls.append(sql)
+        finally:
+            self.recursive_ref = None
+        base_sqls = [self.block(v).sql() for v in base]
+        columns = ', '.join(f'c{i}' for i in range(self.arity(union)))
+        return f'WITH RECURSIVE {cte}({columns}) AS ({" UNION ".join(base_sqls+recursive_sqls)}) SELECT * FROM {cte}'
+
+    def run(self,root):
+        self.root = root
+        # base relations are loaded before any value of the query is interned,
+        # so values of the query that are equal to values of base relations are encoded like them
+        for u,data in self.G.nodes(data=True):
+            if data['op'] == 'get_rel':
+                self.names[u] = self.base_tables.load(self,data,self.arity(u))
+                self.materialized.add(u)
+        condensed = nx.condensation(self.G)
+        for c in reversed(list(nx.topological_sort(condensed))):
+            _check_cancelled(self.cancel)
+            component = condensed.nodes[c]['members']
+            u = next(iter(component))
+            is_recursive = len(component)>1 or self.G.has_edge(u,u)
+            if not is_recursive:
+                if u in self.materialized:
+                    continue
+                if not self.compilable(u):
+                    self.stage(component)
+                elif self.G.in_degree(u)!=1 or u == root:
+                    self.create_view(u)
+                continue
+            sql = self.recursive_sql(component)
+            if sql is None:
+                logger.debug(f"staging recursive component {component}")
+                self.stage(component)
+                continue
+            union = next(v for v in component if self.G.nodes[v]['op']=='union')
+            self.created.append(('TABLE',self.names[union]))
+            self.execute(f'CREATE TABLE {self.names[union]} AS {sql}')
+            self.materialized.add(union)
+            for v in component - {union}:
+                if any(p not in component for p in self.G.predecessors(v)):
+                    self.create_view(v)
+        return self.frame(root)
+
+# %% ../nbs/013_sql_backend.ipynb 11
+def _relation_version(rel_data):
+    """identifies the current content of a base relation.
+    Dataframes in the db are never changed in place, so they are identified by a weak reference to them,
+    disk relations are identified by their chunk files."""
+    if isinstance(rel_data,DiskRelation):
+        try:
+            return tuple((str(p),p.stat().st_mtime_ns) for p in rel_data._chunk_paths())
+        except OSError:
+            return None
+    return weakref.ref(rel_data)
+
+def _same_version(version1,version2):
+    if isinstance(version1,weakref.ref) and isinstance(version2,weakref.ref):
+        return version1() is not None and version1() is version2()
+    return version1 is not None and version1 == version2
+
+def _close_database(conn,db_path):
+    conn.close()
+    if db_path is not None and os.path.exists(db_path):
+        os.remove(db_path)
+
+class _BaseTables():
+    """A sqlite database holding the base relations read by queries, which is kept between queries.
+    A base relation is loaded into a table the first time it is read, and loaded again only when the relation changes.
+    Values interned by the tables of relations that were loaded again are dropped once they are most of the codec,
+    by dropping all the tables."""
+    def __init__(self,spill_dir:Optional[str]=None):
+        if spill_dir is None:
+            db_path = None
+            self.conn = sqlite3.connect(':memory:',check_same_thread=False,isolation_level=None)
+        else:
+            fd,db_path = tempfile.mkstemp(suffix='.db',dir=spill_dir)
+            os.close(fd)
+            self.conn = sqlite3.connect(db_path,check_same_thread=False,isolation_level=None)
+        # statements are committed as they run, so that interrupting a statement does not roll back the tables of earlier queries.
+        # The database is closed when the tables are garbage collected, for example when the thread holding them exits
+        self.close = weakref.finalize(self,_close_database,self.conn,db_path)
+        self.codec = _ValueCodec()
+        # (relation name, columns, filters) -> (version, table name, number of values interned when the table was loaded)
+        self.tables = {}
+        self.stale_values = 0
+        self.table_counter = itertools.count()
+        self.query_counter = itertools.count()
+
+    def compact(self):
+        """drops all the tables if most of the interned values belong to tables that were loaded again"""
+        if self.stale_values==0 or 2*self.stale_values < len(self.codec.values):
+            return
+        logger.debug(f"dropping the base tables to release {self.stale_values} interned values")
+        for _,table,_ in self.tables.values():
+            self.conn.execute(f'DROP TABLE IF EXISTS {table}')
+        self.tables = {}
+        self.codec = _ValueCodec()
+        self.stale_values = 0
+
+    def load(self,program,data,arity)->str:
+        """returns the name of the table holding the base relation read by the get_rel node with data, loading it if the relation changed"""
+        key = (data['rel'],repr(data.get('columns')),repr(data.get('filters')))
+        version = _relation_version(data['db'][data['rel']])
+        if key in self.tables:
+            old_version,table,interned = self.tables.pop(key)
+            if _same_version(old_version,version):
+                self.tables[key] = (old_version,table,interned)
+                return table
+            program.execute(f'DROP TABLE {table}')
+            self.stale_values += interned
+        table = f'b{next(self.table_counter)}'
+        interned = len(self.codec.values)
+        program.insert(table,get_rel(**data),arity,self.codec)
+        self.tables[key] = (version,table,len(self.codec.values)-interned)
+        return table
+
+class SQLBackend(Backend):
+    """A backend that compiles query graphs to SQL and runs them on an embedded SQLite database.
+    Operators that can not be expressed in SQL, such as IE functions and user defined aggregations, are computed with pandas.
+    Base relations are kept in the database between queries, and loaded again only when they change.
+    """
+    def __init__(self,
+        spill_dir:Optional[str]=None, # directory for the database file, if None the database is kept in memory
+        ):
+        super().__init__(name='sqlite')
+        self.spill_dir = spill_dir
+        # queries can run concurrently in different threads, so each thread keeps its own database and the statements of its own last query
+        self._local = threading.local()
+
+    @property
+    def last_sql(self)->List[str]:
+        """the SQL statements of the last query computed by the calling thread"""
+        return getattr(self._local,'statements',[])
+
+    def _base_tables(self):
+        if getattr(self._local,'base_tables',None) is None:
+            self._local.base_tables = _BaseTables(self.spill_dir)
+        return self._local.base_tables
+
+    def close(self):
+        """closes the database of the calling thread, databases of other threads are closed when their threads exit"""
+        base_tables = getattr(self._local,'base_tables',None)
+        if base_tables is not None:
+            base_tables.close()
+            self._local.base_tables = None
+
+    def compute_node(self,G,root,ret_inter=False,memory=None,cancel=None):
+        # sqlite spills its own intermediate tables to disk, so the memory budget of intermediate results is not used
+        base_tables = self._base_tables()
+        base_tables.compact()
+        conn = base_tables.conn
+        if cancel is not None:
+            # sqlite calls the progress handler while running statements, and interrupts the statement if it returns a true value
+            conn.set_progress_handler(cancel.is_set,1000)
+        program = _SQLProgram(G,base_tables,self,cancel=cancel)
+        try:
+            res = program.run(root)
+            if ret_inter:
+                intermediate = {u:[program.frame(u)] for u in program.materialized}
+        except sqlite3.OperationalError as e:
+            if cancel is not None and cancel.is_set():
+                raise CancelledError("query execution was cancelled") from e
+            raise e
+        finally:
+            self._local.statements = program.statements
+            conn.set_progress_handler(None,0)
+            program.drop()
+        if ret_inter:
+            return res,intermediate
+        return res
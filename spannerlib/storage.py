@@ -0,0 +1,237 @@
+"""On disk storage of base relations that are too large to hold in memory"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/007_relation_storage.ipynb.
+
+# %% auto 0
+__all__ = ['logger', 'DiskRelation', 'write_disk_relation', 'write_relation_file', 'read_relation_file', 'write_docs_file',
+           'read_docs_file']
+
+# %% ../nbs/007_relation_storage.ipynb 3
+import os
+import pytest
+import tempfile
+from copy import copy
+import pandas as pd
+from pathlib import Path
+from typing import no_type_check, Set, Sequence, Any,Optional,List,Callable,Dict,Union,Iterable
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import logging
+logger = logging.getLogger(__name__)
+
+from .span import Span
+from .ra import _col_names,drop_duplicate_rows
+
+# %% ../nbs/007_relation_storage.ipynb 6
+_PRIMITIVE_TYPES = (str,int,float,bool)
+
+def _chunk_file_name(i):
+    return f'part-{i:06d}.parquet'
+
+class DiskRelation():
+    """A base relation stored on disk as a directory of parquet chunks, that is scanned lazily."""
+    def __init__(self,
+        path:Union[str,Path], # directory holding the parquet chunks of the relation
+        arity:int=None, # arity of the relation, needed only if the directory has no chunks yet
+        ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True,exist_ok=True)
+        # the chunks a snapshot is limited to, None to read all the chunks in the directory
+        self._chunks = None
+        chunks = self._chunk_paths()
+        if len(chunks)>0:
+            self.schema = ds.dataset(str(chunks[0]),format='parquet').schema
+            self.arity = len(self.schema)
+        elif arity is not None:
+            self.schema = None
+            self.arity = arity
+        else:
+            raise ValueError(f"Disk relation at {self.path} has no chunks, so its arity must be given")
+        self.columns = _col_names(self.arity)
+
+    def _chunk_paths(self):
+        if self._chunks is not None:
+            return self._chunks
+        return sorted(self.path.glob('part-*.parquet'))
+
+    def __repr__(self):
+        return f"DiskRelation({self.path})"
+
+    def snapshot(self):
+        """returns a read only view of the relation with the chunks it has now, which is not affected by later appends"""
+        snap = copy(self)
+        snap._chunks = self._chunk_paths()
+        return snap
+
+    def __len__(self):
+        """the number of stored rows, rows stored in several chunks are counted once per chunk"""
+        chunks = self._chunk_paths()
+        if len(chunks)==0:
+            return 0
+        return ds.dataset([str(p) for p in chunks],format='parquet').count_rows()
+
+    @property
+    def empty(self):
+        return len(self._chunk_paths())==0
+
+    def append(self,
+        df:pd.DataFrame, # rows to add to the relation, columns are matched by position
+        ):
+        """writes the distinct rows of df as a new chunk of the relation.
+        Stored chunks are never read while appending, so rows that are already stored are written again,
+        and are dropped when the relation is scanned."""
+        if self._chunks is not None:
+            raise ValueError(f"Can not append to a snapshot of the disk relation {self.path}")
+        if df is None or len(df)==0:
+            return
+        if len(df.columns)!=self.arity:
+            raise ValueError(f"Trying to add rows of arity {len(df.columns)} to disk relation {self.path} of arity {self.arity}")
+        for col in df.columns:
+            non_primitive = df[col][~df[col].map(lambda x: isinstance(x,_PRIMITIVE_TYPES))]
+            if len(non_primitive)>0:
+                raise ValueError(f"Disk relations can only hold primitive values {_PRIMITIVE_TYPES}, "
+                                 f"got {non_primitive.iloc[0]!r} of type {type(non_primitive.iloc[0])}")
+        table = pa.Table.from_pandas(df.set_axis(self.columns,axis=1),schema=self.schema,preserve_index=False)
+        if self.schema is None:
+            self.schema = table.schema
+        # rows are compared after conversion to the stored types, so that 1 and 1.0 in a float column are the same row
+        new_rows = drop_duplicate_rows(table.to_pandas())
+        table = pa.Table.from_pandas(new_rows,schema=self.schema,preserve_index=False)
+        # the chunk is written under a temporary name and renamed, so that readers never see a partially written chunk
+        chunk_path = self.path/_chunk_file_name(len(self._chunk_paths()))
+        tmp_path = chunk_path.with_suffix('.tmp')
+        pq.write_table(table,tmp_path)
+        os.replace(tmp_path,chunk_path)
+
+    def head(self,n:int=5):
+        """returns the first n rows of the relation"""
+        chunks = self._chunk_paths()
+        if len(chunks)==0:
+            return pd.DataFrame(columns=self.columns)
+        return ds.dataset([str(p) for p in chunks],format='parquet').head(n).to_pandas()
+
+    def scan(self,
+        columns:Optional[List[str]]=None, # columns to read, all columns if None
+        filters:Optional[List[tuple]]=None, # list of (column,value) equality conditions that rows must satisfy
+        ):
+        """reads the distinct rows of the relation that match all filters, keeping only the requested columns.
+        Rows are deduplicated after the projection, which also drops duplicates that chunks written by other tools may hold."""
+        if columns is None:
+            columns = self.columns
+        chunks = self._chunk_paths()
+        if len(chunks)==0:
+            return pd.DataFrame(columns=columns)
+        condition = None
+        for col,val in (filters or []):
+            col_condition = ds.field(col)==val
+            condition = col_condition if condition is None else condition & col_condition
+        dataset = ds.dataset([str(p) for p in chunks],format='parquet')
+        return drop_duplicate_rows(dataset.to_table(columns=list(columns),filter=condition).to_pandas())
+
+# %% ../nbs/007_relation_storage.ipynb 7
+def write_disk_relation(
+    path:Union[str,Path], # directory to write the relation to
+    data:Union[pd.DataFrame,Iterable[pd.DataFrame]], # a dataframe or an iterable of dataframes, for example `pd.read_csv(...,chunksize=n)`
+    chunk_size:int=100_000, # max number of rows per chunk when data is a single dataframe
+    )->DiskRelation:
+    """writes data into a disk relation in path chunk by chunk, never holding more than a single chunk in memory.
+    If path already holds a disk relation, the data is appended to it."""
+    if isinstance(data,pd.DataFrame):
+        chunks = (data.iloc[i:i+chunk_size] for i in range(0,len(data),chunk_size))
+    else:
+        chunks = data
+    disk_rel = None
+    for chunk in chunks:
+        if disk_rel is None:
+            disk_rel = DiskRelation(path,arity=len(chunk.columns))
+        disk_rel.append(chunk)
+    if disk_rel is None:
+        raise ValueError(f"Trying to write an empty relation to {path}")
+    return disk_rel
+
+# %% ../nbs/007_relation_storage.ipynb 16
+def _is_span_column(values):
+    return len(values)>0 and values.map(lambda x: isinstance(x,Span)).all()
+
+def write_relation_file(
+    df:pd.DataFrame, # the relation to write
+    path:Union[str,Path], # path of the arrow file to write
+    docs:Dict, # a mapping from (doc name,doc text) to doc id, documents of spans in df are added to it
+    ):
+    """writes a relation to an uncompressed arrow file, that can be memory mapped when read back.
+    Span columns are stored as (doc id,start,end) columns referencing the documents in docs."""
+    arrays = {}
+    span_columns = []
+    for i in range(len(df.columns)):
+        values = df.iloc[:,i]
+        if _is_span_column(values):
+            span_columns.append(i)
+            arrays[f'col_{i}.doc'] = pa.array([docs.setdefault((span.name,span.doc),len(docs)) for span in values],type=pa.int64())
+            arrays[f'col_{i}.start'] = pa.array([span.start for span in values],type=pa.int64())
+            arrays[f'col_{i}.end'] = pa.array([span.end for span in values],type=pa.int64())
+        else:
+            try:
+                arrays[f'col_{i}'] = pa.array(values.tolist())
+            except (pa.ArrowInvalid,pa.ArrowTypeError) as e:
+                raise ValueError(f"Can not write column {i} of relation to {path}, "
+                                 f"columns must hold either Spans or values of a single primitive type: {e}")
+    table = pa.table(arrays).replace_schema_metadata({
+        'arity':str(len(df.columns)),
+        'span_columns':','.join(str(i) for i in span_columns)
+    })
+    # the file is written under a temporary name and renamed, so relations read from a previous version of it keep their memory map
+    path = Path(path)
+    tmp_path = path.with_suffix('.tmp')
+    with pa.OSFile(str(tmp_path),'wb') as sink:
+        with pa.ipc.new_file(sink,table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path,path)
+
+def _zero_copy_column(col:pa.ChunkedArray):
+    """converts an arrow column to pandas, numeric columns without nulls are views of the arrow buffers"""
+    if (col.num_chunks==1 and col.null_count==0 and
+        (pa.types.is_integer(col.type) or pa.types.is_floating(col.type))):
+        return pd.Series(col.chunk(0).to_numpy(zero_copy_only=True),copy=False)
+    return col.to_pandas()
+
+def read_relation_file(
+    path:Union[str,Path], # path of an arrow file written by `write_relation_file`
+    docs:List, # list of (doc name,doc text) indexed by doc id
+    )->pd.DataFrame:
+    """reads a relation from a memory mapped arrow file.
+    Numeric columns without nulls are read only views of the mapped file, so they are not copied or even read until they are used.
+    Other primitive columns are converted by arrow, and span columns are rebuilt row by row, creating a Span object for every row."""
+    table = pa.ipc.open_file(pa.memory_map(str(path),'r')).read_all()
+    metadata = table.schema.metadata
+    arity = int(metadata[b'arity'])
+    span_columns = {int(i) for i in metadata[b'span_columns'].decode().split(',') if i!=''}
+    columns = {}
+    for i,col_name in enumerate(_col_names(arity)):
+        if i in span_columns:
+            doc_ids = _zero_copy_column(table.column(f'{col_name}.doc'))
+            starts = _zero_copy_column(table.column(f'{col_name}.start'))
+            ends = _zero_copy_column(table.column(f'{col_name}.end'))
+            columns[col_name] = pd.Series([Span(docs[doc_id][1],start,end,name=docs[doc_id][0])
+                for doc_id,start,end in zip(doc_ids.tolist(),starts.tolist(),ends.tolist())],dtype=object)
+        else:
+            columns[col_name] = _zero_copy_column(table.column(col_name))
+    # without copying, pandas keeps each column in its own block instead of consolidating them into a copy
+    return pd.DataFrame(columns,columns=_col_names(arity),copy=False)
+
+def write_docs_file(docs:Dict,path:Union[str,Path]):
+    """writes the documents collected by `write_relation_file` to an arrow file"""
+    ordered = sorted(docs.items(),key=lambda item: item[1])
+    table = pa.table({
+        'name':pa.array([name for (name,text),doc_id in ordered],type=pa.string()),
+        'text':pa.array([text for (name,text),doc_id in ordered],type=pa.large_string()),
+    })
+    with pa.OSFile(str(path),'wb') as sink:
+        with pa.ipc.new_file(sink,table.schema) as writer:
+            writer.write_table(table)
+
+def read_docs_file(path:Union[str,Path])->List:
+    """reads documents written by `write_docs_file` as a list of (doc name,doc text) indexed by doc id"""
+    table = pa.ipc.open_file(pa.memory_map(str(path),'r')).read_all()
+    return list(zip(table.column('name').to_pylist(),table.column('text').to_pylist()))
+